@@ -1,59 +1,472 @@
-import requests
-from bs4 import BeautifulSoup
+import heapq
 import os
-import urllib3
+import time
 import re
+import threading
 import unidecode
 import urllib
+from collections import OrderedDict, namedtuple
+from functools import wraps
 from urllib.parse import urljoin
+from download_cache import get_download_cache
+from logger import get_logger, fields, debug_enabled
 
-#SELENIUM
-from selenium import webdriver
-from selenium.webdriver.edge.service import Service
-from selenium.webdriver.edge.options import Options
-from selenium.webdriver.common.by import By
+# requests (vía http_session) se importa al descargar: el ranking solo necesita
+# la biblioteca estándar y unidecode
 
+log = get_logger("scraping")
 
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+DOWNLOAD_RETRIES = 4
+DOWNLOAD_BACKOFF = 2
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# (conexión, lectura entre bloques): la lectura no limita la duración total
+DOWNLOAD_TIMEOUT = (10, 60)
+
+class RetryableDownloadError(Exception):
+    pass
+
+
+_URL_CHARS_RE = re.compile(r'[_/%+\-\.,:;]')
+_DOMAIN_RE = re.compile(r'https?://[^/]+/')
+_DRUPAL_FILES_RE = re.compile(r'sites/default/files/[^/]+/')
+_EXTENSION_RE = re.compile(r'\.(pdf|doc|xlsx?)$')
+_SPACES_RE = re.compile(r'\s+')
+
+MESES = [
+    'enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio',
+    'julio', 'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre'
+]
+
+# Candidatos que conserva el ranking y margen bajo el cual el fondo se marca para revisión
+DEFAULT_TOP_K = 5
+LOW_CONFIDENCE_MARGIN = 0.5
+
+FICHA_TECNICA_TERMS = [
+    'fichatecnica', 'ficha tecnica', 'fichastecnicas', 'fichas tecnicas', 'fichas tecnica',
+    'ficha tecnicas', ' ficha tecnica', ' ficha tecnica ', 'fichas técnicas', 'ficha'
+]
 
-class Scraping:    
 
-    def download_pdf(self, pdf_url, output_dir='Fichas tecnicas', filename='FichaTecnica.pdf'):
+class LRUCache:
+    """Memoización acotada con desalojo LRU y contadores de aciertos/fallos (segura entre hilos)."""
+
+    _MISSING = object()
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key, self._MISSING)
+            if value is self._MISSING:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "maxsize": self.maxsize}
+
+
+_NORMALIZATION_CACHES = {
+    'normalize_text': LRUCache(8192),
+    'find_fund_variations': LRUCache(1024),
+    'find_month_variations': LRUCache(64),
+    'find_year_variations': LRUCache(64),
+}
+
+
+def _memoized(method):
+    """
+    Cachea un método sin estado de Scraping por sus argumentos (sin `self`).
+    Las listas se guardan como tuplas y se devuelven como listas nuevas para
+    que quien llama pueda modificarlas sin tocar la caché.
+    """
+    cache = _NORMALIZATION_CACHES[method.__name__]
+
+    @wraps(method)
+    def wrapper(self, *args):
         try:
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir)
+            value = cache.get(args)
+        except TypeError:
+            # Argumento no hashable: calcular sin caché
+            return method(self, *args)
+        if value is LRUCache._MISSING:
+            value = method(self, *args)
+            cache.put(args, tuple(value) if isinstance(value, list) else value)
+            return value
+        return list(value) if isinstance(value, tuple) else value
 
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
-            }
+    return wrapper
 
-            response = requests.get(pdf_url, headers=headers, verify=False, timeout=10)
 
-            if response.status_code == 200:
-                if not filename:
-                    filename = pdf_url.split('/')[-1]
-                
-                filepath = os.path.join(output_dir, filename)
-                with open(filepath, 'wb') as f:
-                    f.write(response.content)
-                
-                print(f'Descargado: {filepath}')
+def normalization_cache_stats():
+    """Aciertos/fallos de las cachés de normalización y variaciones, para el resumen de la ejecución."""
+    return {name: cache.stats() for name, cache in _NORMALIZATION_CACHES.items()}
+
+
+def _alternation(template, variations):
+    """Compila `template` con todas las variaciones en un solo grupo alternado; None si no hay variaciones."""
+    if not variations:
+        return None
+    group = '|'.join(re.escape(v) for v in variations)
+    return re.compile(template.format(group))
+
+
+Candidate = namedtuple("Candidate", ["score", "breakdown", "href"])
+
+
+class Ranking:
+    """
+    Mejores candidatos de una consulta, de mejor a peor, y margen de confianza:
+    la distancia entre el primero y el siguiente enlace distinto.
+    """
+
+    def __init__(self, candidates, margin):
+        self.candidates = candidates
+        self.margin = margin
+
+    def __bool__(self):
+        return bool(self.candidates)
+
+    @property
+    def best(self):
+        return self.candidates[0].href if self.candidates else None
+
+    @property
+    def score(self):
+        return self.candidates[0].score if self.candidates else 0
+
+    def low_confidence(self, threshold=LOW_CONFIDENCE_MARGIN):
+        return bool(self.candidates) and self.margin < threshold
+
+
+class LinkScorer:
+    """
+    Puntuador precompilado para una consulta (admin, fondo, año, mes).
+
+    Construye una sola vez los patrones que `is_fund_match`, `is_month_match`,
+    `is_year_match` y `find_date_match` generan por cada enlace, y produce
+    exactamente los mismos pesos. Se obtiene con `Scraping.build_scorer`.
+    """
+
+    def __init__(self, scraping, fund_variations, month_variations, year_variations, ficha_variations):
+        self._scraping = scraping
+
+        # Fondo: una regex por palabra distinta; las variaciones guardan sus palabras
+        self._fund_variations = []
+        self._fund_words = {}
+        for variation in fund_variations:
+            words = [w for w in variation.strip().split() if w]
+            if not words:
+                continue
+            self._fund_variations.append(words)
+            for word in words:
+                if word not in self._fund_words:
+                    self._fund_words[word] = re.compile(rf'\b{re.escape(word)}\b')
+
+        # Mes: cualquier coincidencia textual pesa 2, si no cualquier numérica pesa 1.5
+        text_months = [m for m in month_variations if not m.isdigit()]
+        numeric_months = [m for m in month_variations if m.isdigit()]
+        self._text_month_re = _alternation(r'(^|[^\w]|\d)({})($|[^\w]|\d)', text_months)
+        self._numeric_month_re = _alternation(r'(^|[^\d])({})($|[^\d])', numeric_months)
+
+        self._year_re = _alternation(r'(^|[^\d]|[a-zA-Z])({})($|[^\d]|[a-zA-Z])', year_variations)
+
+        numeric_patterns = scraping.find_numeric_date_patterns(month_variations, year_variations)
+        self._numeric_date_re = _alternation(r'(^|[^\d])({})($|[^\d])', numeric_patterns)
+
+        self._ficha_terms = [v.strip() for v in ficha_variations]
+
+    def fund_score(self, normalized_link):
+        matched = {
+            word for word, pattern in self._fund_words.items()
+            if word in normalized_link and pattern.search(normalized_link)
+        }
+        max_score = 0.0
+        for words in self._fund_variations:
+            match_count = sum(1 for w in words if w in matched)
+            if match_count > 0:
+                max_score = max(max_score, 1 + (match_count - 1) * 0.1)
+        return max_score
+
+    def date_score(self, normalized_link):
+        if self._text_month_re and self._text_month_re.search(normalized_link):
+            month_weight = 2
+        elif self._numeric_month_re and self._numeric_month_re.search(normalized_link):
+            month_weight = 1.5
+        else:
+            month_weight = 0
+        year_weight = 1.5 if self._year_re and self._year_re.search(normalized_link) else 0
+
+        total_weight = month_weight + year_weight
+        description_parts = []
+        if month_weight > 0:
+            description_parts.append("Numeric month match")
+        if year_weight > 0:
+            description_parts.append("Year match")
+        if self._numeric_date_re and self._numeric_date_re.search(normalized_link):
+            total_weight += 3
+            description_parts.append("Numeric date pattern match")
+
+        description = ", ".join(description_parts) if total_weight else "No date match"
+        return total_weight, description
+
+    def ficha_match(self, normalized_link):
+        return any(term in normalized_link for term in self._ficha_terms)
+
+    def score(self, normalized_link):
+        """Retorna (peso total, detalles, desglose) de un enlace ya normalizado."""
+        matches = 0
+        match_details = []
+        breakdown = {'fund': 0.0, 'date': 0, 'ficha': 0}
+
+        fund_score = self.fund_score(normalized_link)
+        if fund_score > 0:
+            matches += fund_score
+            match_details.append(f"Fund match ({fund_score:.1f})")
+            breakdown['fund'] = fund_score
+
+        date_weight, date_desc = self.date_score(normalized_link)
+        if date_weight > 0:
+            matches += date_weight
+            match_details.append(date_desc)
+            breakdown['date'] = date_weight
+
+        if self._ficha_terms and self.ficha_match(normalized_link):
+            matches += 1.5
+            match_details.append("Ficha Tecnica match")
+            breakdown['ficha'] = 1.5
+
+        return matches, match_details, breakdown
+
+    def normalize_link(self, link_obj):
+        """Une href, texto y título del enlace y los normaliza como en el filtrado."""
+        return self._scraping.normalize_link(link_obj)
+
+    def score_links(self, links):
+        """Puntúa un lote de enlaces en una pasada: [(href, enlace normalizado, peso, detalles, desglose)]."""
+        scored = []
+        for link_obj in links:
+            normalized_link = self.normalize_link(link_obj)
+            matches, match_details, breakdown = self.score(normalized_link)
+            scored.append((link_obj.get('href', ''), normalized_link, matches, match_details, breakdown))
+        return scored
+
+    def top_k(self, links, k=DEFAULT_TOP_K):
+        """
+        Los `k` mejores enlaces distintos en una sola pasada con un heap acotado.
+
+        Los empates de peso se resuelven por la URL más corta y luego por la
+        posición más tardía en la página (la que elegía el filtrado clásico).
+        """
+        normalized_links = ((link_obj.get('href', ''), self.normalize_link(link_obj)) for link_obj in links)
+        return self.top_k_normalized(normalized_links, k=k)
+
+    def top_k_normalized(self, normalized_links, k=DEFAULT_TOP_K):
+        """
+        Igual que `top_k` sobre pares (href, enlace normalizado) ya calculados.
+
+        Los href repetidos (ícono + texto) se colapsan antes del heap: cada uno
+        conserva su mejor peso y, a igual peso, su primera posición, así el
+        ganador no depende de `k`.
+        """
+        best = {}
+        debug = debug_enabled()
+
+        for position, (href, normalized_link) in enumerate(normalized_links):
+            matches, match_details, breakdown = self.score(normalized_link)
+            if debug:
+                log.debug("Link%s", normalized_link, extra=fields(peso=matches, detalles=match_details))
+
+            key = (matches, -len(href), position)
+            previous = best.get(href)
+            if previous is None or previous[0][:2] < key[:2]:
+                best[href] = (key, breakdown)
+
+        # Con al menos dos entradas el margen sale del mismo heap acotado
+        ordered = heapq.nlargest(max(k, 2), ((key, href, breakdown) for href, (key, breakdown) in best.items()))
+        candidates = [Candidate(key[0], breakdown, href) for key, href, breakdown in ordered[:k]]
+        if not ordered:
+            margin = 0
+        elif len(ordered) == 1:
+            margin = ordered[0][0][0]
+        else:
+            margin = ordered[0][0][0] - ordered[1][0][0]
+        return Ranking(candidates, margin)
+
+
+class Scraping:    
+
+    def download_pdf(self, pdf_url, output_dir='Fichas tecnicas', filename='FichaTecnica.pdf',
+                     retries=DOWNLOAD_RETRIES, timeout=DOWNLOAD_TIMEOUT, cache=None):
+        """
+        Descarga el PDF en bloques a un archivo temporal `.part` y lo renombra
+        de forma atómica al terminar. Si quedó un `.part` de un intento previo
+        se reanuda con un Range; los cortes de red y errores 5xx se reintentan
+        con espera exponencial.
+
+        Con la caché de descargas se envía un GET condicional y no se reescribe
+        el archivo si el servidor responde 304 o el contenido tiene el mismo
+        SHA-256. Retorna {'path', 'status'} con status 'downloaded',
+        'not_modified' o 'unchanged'.
+        """
+        import requests
+
+        cache = cache or get_download_cache()
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+
+        if not filename:
+            filename = pdf_url.split('/')[-1]
+
+        filepath = os.path.join(output_dir, filename)
+        part_path = filepath + '.part'
+
+        for attempt in range(1, retries + 1):
+            try:
+                conditional = {} if os.path.exists(part_path) else cache.conditional_headers(pdf_url, filepath)
+                response_headers = self._stream_to_part(pdf_url, part_path, conditional, timeout)
+
+                if response_headers is None:
+                    log.info("Sin cambios (304): %s", filepath)
+                    return {'path': filepath, 'status': 'not_modified'}
+
+                result = cache.finalize(pdf_url, part_path, filepath,
+                                        etag=response_headers.get('ETag'),
+                                        last_modified=response_headers.get('Last-Modified'))
+                self._discard_part(part_path)
+                return result
+
+            except RetryableDownloadError as e:
+                error = e
+            except requests.exceptions.Timeout as e:
+                error = Exception(f"Timeout: La descarga de {pdf_url} tardó demasiado y fue cancelada.")
+            except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError) as e:
+                error = Exception(f"Error en la solicitud: {e}")
+            except requests.exceptions.RequestException as e:
+                raise Exception(f"Error en la solicitud: {e}")
+            except Exception as e:
+                raise Exception(f"Otro error en la descarga: {e}")
+
+            if attempt == retries:
+                raise error
+            wait = DOWNLOAD_BACKOFF ** attempt
+            log.warning("Reintento %d/%d de %s en %ss", attempt, retries - 1, pdf_url, wait,
+                        extra=fields(error=str(error)))
+            time.sleep(wait)
+
+    def _stream_to_part(self, pdf_url, part_path, headers, timeout):
+        """
+        Escribe la respuesta en `part_path`, continuando desde su tamaño actual
+        si el servidor lo permite. Retorna las cabeceras de la respuesta, o
+        None si el servidor indicó 304 Not Modified.
+
+        El parcial solo se reanuda con If-Range y el validador (ETag o
+        Last-Modified) guardado al empezarlo: si el archivo remoto cambió, el
+        servidor responde 200 con el archivo completo y se empieza de cero.
+        """
+        from http_session import get_session
+
+        resume_from = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        request_headers = dict(headers)
+        if resume_from:
+            validator = self._read_part_validator(part_path)
+            if validator:
+                request_headers['Range'] = f'bytes={resume_from}-'
+                request_headers['If-Range'] = validator
+            else:
+                # Sin validador no se sabe de qué versión es el parcial
+                self._discard_part(part_path)
+                resume_from = 0
+
+        with get_session().get(pdf_url, headers=request_headers, stream=True, timeout=timeout) as response:
+            if response.status_code == 304:
+                return None
+
+            if response.status_code == 416 and resume_from:
+                # El parcial no coincide con el archivo remoto: empezar de cero
+                self._discard_part(part_path)
+                raise RetryableDownloadError(f"Rango inválido para {pdf_url}, se reinicia la descarga")
+
+            if response.status_code == 206:
+                if self._range_start(response) != resume_from:
+                    # Un tramo que no continúa el parcial no sirve ni como archivo completo
+                    self._discard_part(part_path)
+                    raise RetryableDownloadError(f"Rango inesperado para {pdf_url}, se reinicia la descarga")
+                mode = 'ab' if resume_from else 'wb'
+                expected = resume_from + int(response.headers.get('Content-Length', 0) or 0)
+            elif response.status_code == 200:
+                mode = 'wb'
+                expected = int(response.headers.get('Content-Length', 0) or 0)
+            elif response.status_code >= 500 or response.status_code == 429:
+                raise RetryableDownloadError(f"Error {response.status_code}: No se pudo descargar {pdf_url}")
             else:
                 raise Exception(f"Error {response.status_code}: No se pudo descargar {pdf_url}")
 
-        except requests.exceptions.Timeout:
-            raise Exception(f"Timeout: La descarga de {pdf_url} tardó demasiado y fue cancelada.")
+            if mode == 'wb':
+                self._write_part_validator(part_path, response.headers)
+            with open(part_path, mode) as f:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    if chunk:
+                        f.write(chunk)
 
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"Error en la solicitud: {e}")
+        written = os.path.getsize(part_path)
+        if expected and written < expected and 'Content-Encoding' not in response.headers:
+            raise RetryableDownloadError(f"Descarga incompleta de {pdf_url} ({written}/{expected} bytes)")
 
-        except Exception as e:
-            raise Exception(f"Otro error en la descarga: {e}")
+        return response.headers
+
+    @staticmethod
+    def _read_part_validator(part_path):
+        try:
+            with open(part_path + '.meta', 'r', encoding='utf-8') as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    @staticmethod
+    def _write_part_validator(part_path, response_headers):
+        """Guarda junto al parcial el validador de If-Range: ETag fuerte o, si no hay, Last-Modified."""
+        etag = response_headers.get('ETag')
+        validator = etag if etag and not etag.startswith('W/') else response_headers.get('Last-Modified')
+        meta_path = part_path + '.meta'
+        if validator:
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                f.write(validator)
+        elif os.path.exists(meta_path):
+            os.remove(meta_path)
+
+    @staticmethod
+    def _discard_part(part_path):
+        for path in (part_path, part_path + '.meta'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    @staticmethod
+    def _range_start(response):
+        # Content-Range: bytes 1000-1999/2000
+        match = re.match(r'bytes (\d+)-', response.headers.get('Content-Range', ''))
+        return int(match.group(1)) if match else None
 
 #
 # filtrar links
 #
 
+    @_memoized
     def normalize_text(self, text):
         
         if not isinstance(text, str):
@@ -69,21 +482,22 @@ class Scraping:
         text = unidecode.unidecode(text).lower()
         
         # Replace URL-specific characters and encodings
-        text = re.sub(r'[_/%+\-\.,:;]', ' ', text)
+        text = _URL_CHARS_RE.sub(' ', text)
         
         # Remove file path and domain
-        text = re.sub(r'https?://[^/]+/', '', text)
-        text = re.sub(r'sites/default/files/[^/]+/', '', text)
+        text = _DOMAIN_RE.sub('', text)
+        text = _DRUPAL_FILES_RE.sub('', text)
         
         # Remove file extensions
-        text = re.sub(r'\.(pdf|doc|xlsx?)$', '', text)
+        text = _EXTENSION_RE.sub('', text)
         
         # Replace multiple spaces and trim
-        text = re.sub(r'\s+', ' ', text).strip()
+        text = _SPACES_RE.sub(' ', text).strip()
         
         # Add boundary spaces
         return f' {text} '
 
+    @_memoized
     def find_fund_variations(self, base_fund_name):
         
         normalized_base = self.normalize_text(base_fund_name)
@@ -125,6 +539,7 @@ class Scraping:
         # Remove duplicates while preserving order
         return list(dict.fromkeys(variations))
 
+    @_memoized
     def find_month_variations(self, month):
         
         month_map = {
@@ -148,6 +563,7 @@ class Scraping:
         normalized_month = self.normalize_text(month).strip()
         return [normalized_month] + month_map.get(normalized_month.lower(), [])
 
+    @_memoized
     def find_year_variations(self, year):
         
         year_str = str(year)
@@ -340,93 +756,105 @@ class Scraping:
         cleaned_link = re.sub(query_pattern, '', cleaned_link)
         
         # Clean up extra spaces
-        cleaned_link = re.sub(r'\s+', ' ', cleaned_link).strip()
+        cleaned_link = _SPACES_RE.sub(' ', cleaned_link).strip()
         
         return cleaned_link
 
 
 
     
+    def next_month(self, month):
+        """Mes siguiente a `month` (diciembre -> enero); si no se reconoce se deja igual."""
+        normalized_month = self.normalize_text(month).strip().lower()
+        if normalized_month in MESES:
+            idx = MESES.index(normalized_month)
+            return MESES[(idx + 1) % 12]
+        log.warning("Mes '%s' no reconocido, no se adelanta.", month)
+        return month
+
+    def rank_links(self, links, admin, fondo, year, month, k=DEFAULT_TOP_K, ficha_tecnica=True, adelantar=False):
+        """
+        Ranking de los enlaces de la página para un fondo: retorna un `Ranking`
+        con los `k` mejores candidatos (peso, desglose, href) y el margen entre
+        el primero y el segundo, para decidir sin volver a puntuar.
+        """
+        if adelantar:
+            month = self.next_month(month)
+
+        log.debug("Fondo: %s", fondo)
+        scorer = self.build_scorer(admin, fondo, year, month, ficha_tecnica=ficha_tecnica)
+        return scorer.top_k(links, k=k)
+
+    def rank_many(self, links, queries, k=DEFAULT_TOP_K, ficha_tecnica=True, adelantar=False):
+        """
+        Ranking de muchas consultas (admin, fondo, year, month) contra una misma
+        lista de enlaces; retorna un `Ranking` por consulta, en el mismo orden.
+        Los enlaces se normalizan una sola vez para todas las consultas.
+        """
+        normalized_links = self.normalize_links(links)
+        return [self.rank_normalized(normalized_links, admin, fondo, year, month, k=k,
+                                     ficha_tecnica=ficha_tecnica, adelantar=adelantar)
+                for admin, fondo, year, month in queries]
+
+    def rank_normalized(self, normalized_links, admin, fondo, year, month, k=DEFAULT_TOP_K,
+                        ficha_tecnica=True, adelantar=False):
+        """Ranking de un fondo contra enlaces ya normalizados con `normalize_links`."""
+        if adelantar:
+            month = self.next_month(month)
+        scorer = self.build_scorer(admin, fondo, year, month, ficha_tecnica=ficha_tecnica)
+        return scorer.top_k_normalized(normalized_links, k=k)
+
+    def normalize_link(self, link_obj):
+        """Une href, texto y título del enlace y los normaliza como en el filtrado."""
+        href = link_obj.get('href', '')
+        text = link_obj.get('text', '')
+        title = link_obj.get('title', '')
+        combined_content = f"{href} {text} {title}"
+        cleaned_link = self.remove_uuid_and_random_ids(combined_content)
+        return self.normalize_text(cleaned_link)
+
+    def normalize_links(self, links):
+        """Pares (href, enlace normalizado) de toda la página, independientes de la consulta."""
+        return [(link_obj.get('href', ''), self.normalize_link(link_obj)) for link_obj in links]
+
     def filter_links_with_ai(self, links, admin, fondo, year, month, ficha_tecnica=True, adelantar = False):
         if adelantar:
-            meses = [
-                'enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio',
-                'julio', 'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre'
-            ]
-            normalized_month = self.normalize_text(month).strip().lower()
-            if normalized_month in meses:
-                idx = meses.index(normalized_month)
-                siguiente_mes = meses[(idx + 1) % 12]
-                month = siguiente_mes
-            else:
-                print(f"Mes '{month}' no reconocido, no se adelanta.")
+            month = self.next_month(month)
         
+        log.debug("Fondo: %s", fondo)
+        scorer = self.build_scorer(admin, fondo, year, month, ficha_tecnica=ficha_tecnica)
+
+        filtered_links = []
+        max_matches = 0
+        # Se decide una vez por fondo: sin modo verbose ni buffer activo el bucle no registra nada
+        debug = debug_enabled()
+
+        for href, normalized_link, matches, match_details, breakdown in scorer.score_links(links):
+            if debug:
+                log.debug("Link%s", normalized_link, extra=fields(peso=matches, detalles=match_details))
+
+            if matches >= max_matches:
+                max_matches = matches
+                filtered_links.append(href)
+
+        return filtered_links
+
+    def build_scorer(self, admin, fondo, year, month, ficha_tecnica=True):
+        """Construye el LinkScorer de una consulta; se reutiliza para todos los enlaces de la página."""
         cleaned_fondo = self.clean_fund_name_with_admin(admin, fondo)
-        print(f'Fondo: {fondo}')
-        print(f"Cleaned fund name: {cleaned_fondo}")
+        log.debug("Cleaned fund name: %s", cleaned_fondo)
 
         fund_variations = [
             self.normalize_text(var) for var in 
             self.find_fund_variations(cleaned_fondo)
         ]
-        print(f"Fund variations: {fund_variations}")
+        log.debug("Fund variations: %s", fund_variations)
 
         month_variations = self.find_month_variations(month)
         year_variations = self.find_year_variations(year)
 
         ficha_tecnica_variations = [
-            self.normalize_text(var) for var in 
-            ['fichatecnica', 'ficha tecnica', 'fichastecnicas', 'fichas tecnicas', 'fichas tecnica', 'ficha tecnicas', ' ficha tecnica', ' ficha tecnica ', 'fichas técnicas', 'ficha']
+            self.normalize_text(var) for var in FICHA_TECNICA_TERMS
         ] if ficha_tecnica else []
 
-        filtered_links = []
-        max_matches = 0
-
-        for link_obj in links:
-            # Extraer href, text y title
-            href = link_obj.get('href', '')
-            text = link_obj.get('text', '')
-            title = link_obj.get('title', '')
-
-            # Unir todo para analizar: href + text + title
-            combined_content = f"{href} {text} {title}"
-
-            # Limpiar, normalizar
-            cleaned_link = self.remove_uuid_and_random_ids(combined_content)
-            normalized_link = self.normalize_text(cleaned_link)
-            print(f'Link{normalized_link}')
-
-            matches = 0
-            match_details = []
-            
-            fund_score = self.is_fund_match(normalized_link, fund_variations)
-            if fund_score > 0:
-                matches += fund_score
-                match_details.append(f"Fund match ({fund_score:.1f})")
-                print(f'Fund match ({fund_score:.1f})')
-
-
-            # Date match
-            date_match_count, date_match_desc = self.find_date_match(normalized_link, month_variations, year_variations)
-            if date_match_count > 0:
-                matches += date_match_count
-                match_details.append(date_match_desc)
-                print('Date match')
-
-            # Ficha Tecnica match
-            if ficha_tecnica:
-                ficha_match = any(
-                    var.strip() in normalized_link 
-                    for var in ficha_tecnica_variations
-                )
-                if ficha_match:
-                    matches += 1.5
-                    match_details.append(f"Ficha Tecnica match")
-                    print('Ficha match')
-
-            if matches >= max_matches:
-                max_matches = matches
-                filtered_links.append(href)
-                print(f'-----Peso:{matches}')
-
-        return filtered_links
+        return LinkScorer(self, fund_variations, month_variations, year_variations, ficha_tecnica_variations)
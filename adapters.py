@@ -0,0 +1,209 @@
+import importlib
+import threading
+
+from Scraping import Scraping
+from driver_pool import get_driver_pool, profile_for
+from fund_pipeline import snapshot_links, skip_download, error_results, process_fund
+from logger import get_logger
+
+log = get_logger("crawler")
+
+# Adaptador por administradora (claves de fics.json en minúsculas), como
+# "modulo:Clase". El módulo se importa recién cuando la administradora aparece
+# en la ejecución: rastrear solo Bancolombia no carga Playwright ni BBVA.
+GENERIC_ADAPTER = "adapters:SeleniumAdapter"
+
+ADAPTERS = {
+    "bancolombia": GENERIC_ADAPTER,
+    "bancodebogota": GENERIC_ADAPTER,
+    "davivienda": GENERIC_ADAPTER,
+    "progresion": GENERIC_ADAPTER,
+    "bancodeoccidentefiduoccidente": GENERIC_ADAPTER,
+    "credicorpcapital": GENERIC_ADAPTER,
+    "bbva": "bbva:BBVAAdapter",
+    "itau": "itau_scraper:ItauAdapter",
+}
+
+_adapters = {}
+_adapters_lock = threading.Lock()
+
+
+class AdminAdapter:
+    """
+    Cómo se rastrea una administradora.
+
+    `harvest` dice de dónde salen los enlaces ('selenium', 'playwright',
+    'api'...); con 'selenium' el crawler le dimensiona un pool de navegadores.
+    La ficha se baja con `downloader()` (None = descarga HTTP de Scraping);
+    los adaptadores con sesión propia, como Itaú, descargan desde `crawl_batch`.
+    Con `batch` todas sus páginas van en un solo trabajo (`crawl_batch`);
+    si no, cada página es un trabajo (`crawl_page`). `static_fetch` permite
+    probar antes la ruta HTTP rápida y `adelantar` rankea contra el mes
+    siguiente (fichas publicadas con la fecha de corte del mes próximo).
+    """
+
+    harvest = "selenium"
+    batch = False
+    static_fetch = True
+    adelantar = False
+    browser_profile = None
+
+    def __init__(self, name):
+        self.name = name
+
+    @property
+    def profile(self):
+        """Perfil del pool de navegadores; CRAWL_BROWSER_PROFILES tiene prioridad sobre el del adaptador."""
+        return profile_for(self.name, self.browser_profile)
+
+    def harvest_links(self, url, prefetched=None, tiers=None):
+        """Enlaces candidatos {href, text, title} de la página."""
+        raise NotImplementedError
+
+    def downloader(self):
+        """`download(url, output_dir, filename)` propio, o None para la descarga HTTP de Scraping."""
+        return None
+
+    def crawl_page(self, url, admin, tareas, prefetched=None, tiers=None, journal=None, snapshots=None,
+                   offline=False):
+        """
+        Cosecha los enlaces de la página una sola vez y los evalúa para cada tarea
+        (fondo, year, month) que apunta a ella, periodo por periodo.
+        En modo offline los enlaces salen de las instantáneas y no se descarga nada.
+        """
+        try:
+            all_links = snapshot_links(
+                url, admin, lambda: self.harvest_links(url, prefetched=prefetched, tiers=tiers),
+                snapshots=snapshots, offline=offline,
+            )
+        except Exception as e:
+            return error_results(admin, tareas, e, journal=journal)
+
+        if len(tareas) > 1:
+            log.info("%d fondos/periodos comparten la página %s", len(tareas), url)
+
+        # Varias consultas contra la misma página: los enlaces se normalizan una sola
+        # vez y cada fondo se rankea dentro de su propio bloque de depuración
+        normalized_links = None
+        if all_links and len(tareas) > 1:
+            normalized_links = Scraping().normalize_links(all_links)
+
+        download = skip_download if offline else self.downloader()
+        return [process_fund(all_links, admin, fondo, year, month, download=download, journal=journal,
+                             normalized_links=normalized_links, adelantar=self.adelantar)
+                for fondo, year, month in tareas]
+
+    def crawl_batch(self, admin, paginas, journal=None, snapshots=None):
+        """Todas las páginas de la administradora en un trabajo; `paginas` es una lista de (link, tareas)."""
+        results = []
+        for link, tareas in paginas:
+            results.extend(self.crawl_page(link, admin, tareas, journal=journal, snapshots=snapshots))
+        return results
+
+
+# Recorre el documento, los shadow roots abiertos y los iframes del mismo
+# origen, y devuelve en una sola llamada los anclajes .pdf ya resueltos.
+# Los iframes de otro origen no son accesibles desde aquí: se cuentan para
+# visitarlos aparte cambiando de frame.
+PDF_ANCHORS_JS = """
+    const enlaces = [];
+    let iframesAjenos = 0;
+
+    const visitar = raiz => {
+        raiz.querySelectorAll('a[href], area[href]').forEach(a => {
+            let href = a.getAttribute('href');
+            try { href = new URL(href, a.baseURI).href; } catch (e) { return; }
+            if (!href.toLowerCase().includes('.pdf')) return;
+            enlaces.push({
+                href: href,
+                text: (a.innerText || a.textContent || '').trim(),
+                title: a.getAttribute('title') || '',
+            });
+        });
+        raiz.querySelectorAll('*').forEach(el => {
+            if (el.shadowRoot) visitar(el.shadowRoot);
+            if (el.tagName === 'IFRAME' || el.tagName === 'FRAME') {
+                let doc = null;
+                try { doc = el.contentDocument; } catch (e) { doc = null; }
+                if (doc && doc.documentElement) visitar(doc);
+                else if (el.src && !el.src.startsWith('about:')) iframesAjenos++;
+            }
+        });
+    };
+
+    visitar(document);
+    return {enlaces: enlaces, iframesAjenos: iframesAjenos};
+"""
+
+
+def collect_pdf_anchors(driver):
+    """
+    Anclajes .pdf {href, text, title} de la página actual con un solo
+    execute_script; solo los iframes de otro origen cuestan un viaje extra.
+    """
+    resultado = driver.execute_script(PDF_ANCHORS_JS)
+    links = resultado["enlaces"]
+
+    if resultado["iframesAjenos"]:
+        from selenium.webdriver.common.by import By
+
+        for frame in driver.find_elements(By.CSS_SELECTOR, "iframe, frame"):
+            try:
+                driver.switch_to.frame(frame)
+                links.extend(driver.execute_script(PDF_ANCHORS_JS)["enlaces"])
+            except Exception as e:
+                log.debug("No se pudo leer un iframe: %s", e)
+            finally:
+                driver.switch_to.default_content()
+
+    # El mismo anclaje puede llegar dos veces (iframe accesible visitado también desde afuera)
+    unicos = {(link["href"], link["text"], link["title"]): link for link in links}
+    return list(unicos.values())
+
+
+class SeleniumAdapter(AdminAdapter):
+    """Adaptador genérico: HTML estático si alcanza, si no la página en el pool de Chrome; descarga por HTTP."""
+
+    def harvest_links(self, url, prefetched=None, tiers=None):
+        """
+        Si la ruta HTTP rápida ya trajo anclajes PDF (`prefetched`) se usan tal
+        cual; si no, se abre la página en el navegador y se recuerda que ese
+        dominio necesita navegador.
+        """
+        if prefetched:
+            log.info("[HTTP] %s - %d enlaces PDF sin navegador", url, len(prefetched))
+            return prefetched
+
+        log.info("Intentando abrir: %s", url)
+
+        with get_driver_pool(self.profile).driver() as driver:
+            driver.get(url)
+            all_links = collect_pdf_anchors(driver)
+
+        if all_links and tiers is not None:
+            from http_fetch import TIER_BROWSER
+
+            tiers.record(url, TIER_BROWSER)
+
+        return all_links
+
+
+def load_adapter_class(path):
+    """Importa 'modulo:Clase' y retorna la clase."""
+    module_name, _, class_name = path.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def adapter_path(admin):
+    return ADAPTERS.get(admin.lower().strip(), GENERIC_ADAPTER)
+
+
+def get_adapter(admin):
+    """Adaptador de la administradora; su módulo se importa la primera vez que se pide."""
+    key = admin.lower().strip()
+    with _adapters_lock:
+        adapter = _adapters.get(key)
+        if adapter is None:
+            adapter = load_adapter_class(adapter_path(key))(key)
+            _adapters[key] = adapter
+        return adapter
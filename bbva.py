@@ -1,45 +1,138 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from selenium.webdriver.chrome.options import Options
-import time
 import json
+import re
+import unidecode
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote
+from adapters import AdminAdapter
+from driver_pool import get_driver_pool, close_all_pools, profile_for
+from fund_pipeline import process_fund
+from logger import get_logger, configure_logging, debug_enabled, fields
+
+log = get_logger("bbva")
+
+# Topes de espera (segundos); las esperas terminan apenas se cumple la condición
+IFRAME_TIMEOUT = 30
+DOCUMENTACION_TIMEOUT = 30
+ACORDEON_TIMEOUT = 10
+POLL_FREQUENCY = 0.25
+
+# Descargas HTTP simultáneas una vez resueltas las URLs de los documentos
+BBVA_DOWNLOAD_WORKERS = 4
+
+# Verdadero cuando la sección de documentación de entity-funds-dm ya existe
+# (misma ruta por shadow roots que usa extraer_documentos). En modo lote el
+# documento del fondo anterior queda marcado y se ignora.
+DOCUMENTACION_LISTA_JS = """
+    if (window.__fichaAnterior) return false;
+    const panelTemplate = document.querySelector('cells-template-paper-drawer-panel');
+    if (!panelTemplate || !panelTemplate.shadowRoot) return false;
+    const entityFunds = panelTemplate.shadowRoot.querySelector('entity-funds-dm') ||
+                        document.querySelector('entity-funds-dm');
+    if (!entityFunds || !entityFunds.shadowRoot) return false;
+    return !!(entityFunds.shadowRoot.querySelector('#documentacion') ||
+              entityFunds.shadowRoot.querySelector('[class*="documentacion"]'));
+"""
+
+# Verdadero cuando el contenido del acordeón de Documentación está visible
+ACORDEON_EXPANDIDO_JS = """
+    const panelTemplate = document.querySelector('cells-template-paper-drawer-panel');
+    const accordion = panelTemplate && panelTemplate.querySelector('.accordion');
+    if (!accordion) return false;
+    const docAccordion = Array.from(accordion.querySelectorAll('.accordion-item')).find(item => {
+        const titulo = item.querySelector('.accordion-titulo p');
+        return titulo && titulo.textContent.trim() === 'Documentación';
+    });
+    const contenido = docAccordion && docAccordion.querySelector('.accordion-contenido');
+    return !!contenido && contenido.style.display !== 'none' && contenido.offsetHeight > 0;
+"""
+
+ISIN_RE = re.compile(r'(?:\?|fichaco/)([A-Z0-9]{6,12})(?:/|$)')
+
+
+class FichaAnteriorError(Exception):
+    """El iframe no cargó el fondo pedido y conserva el documento del anterior."""
+
+
+def extraer_isin(url):
+    """Código del fondo en la URL (ej. '.../fondos/?BBVFDIGCB/...' -> 'BBVFDIGCB')."""
+    match = ISIN_RE.search(url)
+    return match.group(1) if match else None
+
+
+def clave_nombre(texto):
+    """
+    Texto comparable entre un nombre de documento y una URL: sin codificación
+    URL, sin tildes (como Scraping.normalize_text), en minúsculas y solo letras
+    y dígitos. 'Ficha técnica' y '.../ficha-tecnica.pdf' comparten 'fichatecnica'.
+    """
+    return re.sub(r'[^a-z0-9]+', '', unidecode.unidecode(unquote(texto)).lower())
+
+
+def documentos_a_links(documentos):
+    """
+    Convierte los documentos con URL en enlaces {href, text, title} para el
+    ranking de Scraping; la fecha publicada va en el texto para que el
+    puntaje de mes/año la tenga en cuenta.
+    """
+    return [
+        {
+            "href": doc["url"],
+            "text": f"{doc.get('categoria', '')} {doc.get('nombre', '')} {doc.get('fecha', '')}",
+            "title": doc.get("nombre", ""),
+        }
+        for doc in documentos
+        if doc.get("url")
+    ]
+
 
 class BBVAFondosScraper:
-    def __init__(self, headless=False):
+    def __init__(self, profile=None):
         """
         Inicializa el scraper
-        :param headless: Si True, ejecuta Chrome sin interfaz gráfica
+        :param profile: Perfil del pool de navegadores ('lean', 'full' o 'visible');
+                        por defecto el configurado para BBVA
         """
-        chrome_options = Options()
-        if headless:
-            chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-        
-        self.driver = webdriver.Chrome(options=chrome_options)
-        self.wait = WebDriverWait(self.driver, 30)
+        self.pool = get_driver_pool(profile or profile_for("bbva"))
+        self.driver = self.pool.acquire()
+        self.wait = WebDriverWait(self.driver, IFRAME_TIMEOUT, poll_frequency=POLL_FREQUENCY)
         self.documentos_data = []
     
     def ejecutar_javascript(self, script, *args):
         """Ejecuta JavaScript y retorna el resultado"""
         return self.driver.execute_script(script, *args)
+
+    def esperar_condicion_js(self, script, timeout, descripcion):
+        """
+        Sondea `script` (debe retornar booleano) hasta que sea verdadero o se
+        agote `timeout`. Retorna True si la condición se cumplió.
+        """
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=POLL_FREQUENCY).until(
+                lambda driver: driver.execute_script(script)
+            )
+            return True
+        except TimeoutException:
+            log.warning("Tiempo agotado (%ss) esperando %s", timeout, descripcion)
+            return False
+
+    def esperar_documentacion(self, timeout=DOCUMENTACION_TIMEOUT):
+        """Espera a que exista la sección de documentación dentro del shadow DOM del iframe."""
+        return self.esperar_condicion_js(DOCUMENTACION_LISTA_JS, timeout, "la sección de documentación")
     
     def verificar_estructura_iframe(self):
         """
         Verifica la estructura del iframe para debugging
         """
-        print("\n" + "="*60)
-        print("VERIFICACIÓN DE ESTRUCTURA DEL IFRAME")
-        print("="*60)
+        log.debug("Verificación de estructura del iframe")
         
         try:
             # Obtener el HTML del body
             body_html = self.ejecutar_javascript("return document.body.innerHTML;")
-            print(f"\n✓ Longitud del HTML del body: {len(body_html)} caracteres")
+            log.debug("Longitud del HTML del body: %d caracteres", len(body_html))
             
             # Verificar si hay shadow roots
             script = """
@@ -74,16 +167,13 @@ class BBVAFondosScraper:
             """
             
             shadow_roots = self.ejecutar_javascript(script)
-            print(f"✓ Shadow Roots encontrados: {len(shadow_roots)}")
+            log.debug("Shadow Roots encontrados: %d", len(shadow_roots))
             
-            if shadow_roots:
-                print("\nElementos con Shadow DOM:")
-                for sr in shadow_roots[:10]:  # Mostrar solo los primeros 10
-                    print(f"   • <{sr['tag']}> (profundidad: {sr['depth']})")
+            for sr in shadow_roots[:10]:  # Mostrar solo los primeros 10
+                log.debug("Elemento con Shadow DOM <%s> (profundidad: %s)", sr['tag'], sr['depth'])
             
             # Buscar elementos accordion
-            print("\n" + "-"*60)
-            print("Buscando elementos 'accordion'...")
+            log.debug("Buscando elementos 'accordion'...")
             
             accordion_script = """
                 let accordions = document.querySelectorAll('[class*="accordion"]');
@@ -96,18 +186,15 @@ class BBVAFondosScraper:
             """
             
             accordions = self.ejecutar_javascript(accordion_script)
-            print(f"✓ Elementos accordion encontrados: {len(accordions)}")
+            log.debug("Elementos accordion encontrados: %d", len(accordions))
             
             for acc in accordions[:5]:
-                print(f"\n   <{acc['tag']}>")
-                print(f"      class: {acc['className']}")
-                print(f"      id: {acc['id']}")
-                print(f"      texto: {acc['text'][:50]}...")
+                log.debug("<%s> class=%s id=%s texto=%s...", acc['tag'], acc['className'], acc['id'], acc['text'][:50])
             
             return True
             
         except Exception as e:
-            print(f"❌ Error en verificación: {e}")
+            log.warning("Error en verificación: %s", e)
             return False
     
     def buscar_acordeon_shadow_dom(self):
@@ -115,7 +202,7 @@ class BBVAFondosScraper:
         Busca el acordeón navegando específicamente por el CELLS-TEMPLATE-PAPER-DRAWER-PANEL
         """
         try:
-            print("\n   Buscando en estructura específica del Shadow DOM...")
+            log.debug("Buscando en estructura específica del Shadow DOM...")
             
             script = """
             function buscarAcordeonEnEstructura() {
@@ -166,23 +253,20 @@ class BBVAFondosScraper:
             resultado = self.ejecutar_javascript(script)
             
             if resultado.get('error'):
-                print(f"   ⚠ Error en la búsqueda: {resultado['error']}")
+                log.warning("Error en la búsqueda: %s", resultado['error'])
                 return False
                 
             if resultado.get('encontrado'):
-                print("   ✓ Acordeón encontrado en estructura específica")
-                print(f"   • Ruta: {resultado.get('ruta')}")
                 info = resultado.get('info', {})
-                print(f"   • Título: {info.get('titulo')}")
+                log.info("Acordeón encontrado en estructura específica")
+                log.debug("Ruta: %s | Título: %s", resultado.get('ruta'), info.get('titulo'))
                 return True
             
-            print("   ❌ No se encontró el acordeón en la estructura esperada")
+            log.warning("No se encontró el acordeón en la estructura esperada")
             return False
                 
         except Exception as e:
-            print(f"   ❌ Error buscando en estructura específica: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("Error buscando en estructura específica: %s", e)
             return False
     
     def expandir_acordeon_especifico(self):
@@ -190,7 +274,7 @@ class BBVAFondosScraper:
         Expande el acordeón específico de documentación
         """
         try:
-            print("\n   Intentando expandir acordeón específico...")
+            log.debug("Intentando expandir acordeón específico...")
             
             script = """
             function expandirAcordeonDocumentacion() {
@@ -237,17 +321,16 @@ class BBVAFondosScraper:
             resultado = self.ejecutar_javascript(script)
             
             if resultado:
-                print("   ✓ Acordeón expandido correctamente")
-                time.sleep(3)  # Dar tiempo para que se expanda
+                # Esperar solo hasta que el contenido sea visible
+                self.esperar_condicion_js(ACORDEON_EXPANDIDO_JS, ACORDEON_TIMEOUT, "la expansión del acordeón")
+                log.info("Acordeón expandido correctamente")
                 return True
             else:
-                print("   ❌ No se pudo expandir el acordeón específico")
+                log.warning("No se pudo expandir el acordeón específico")
                 return False
                 
         except Exception as e:
-            print(f"   ❌ Error expandiendo acordeón específico: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("Error expandiendo acordeón específico: %s", e)
             return False
     
     def scrape_fondo(self, url):
@@ -255,74 +338,175 @@ class BBVAFondosScraper:
         Extrae información del fondo desde la página con iframe
         """
         try:
-            print("=" * 60)
-            print("INICIANDO SCRAPING DE BBVA FONDOS")
-            print("=" * 60)
+            log.info("Iniciando scraping de BBVA fondos: %s", url)
             
             # Navegar a la página principal
-            print("\n[1/7] Cargando página principal...")
+            log.debug("[1/7] Cargando página principal...")
             self.driver.get(url)
-            time.sleep(5)  # Mantenemos el tiempo original
             
             # Esperar a que el iframe esté presente
-            print("[2/7] Esperando que cargue el iframe...")
+            log.debug("[2/7] Esperando que cargue el iframe...")
             iframe = self.wait.until(
                 EC.presence_of_element_located((By.ID, "iframeIsin"))
             )
-            print("✓ Iframe encontrado")
+            log.debug("Iframe encontrado")
             
             # Obtener el src del iframe
             iframe_src = iframe.get_attribute('src')
-            print(f"   URL del iframe: {iframe_src}")
-            
-            # Cambiar al contexto del iframe (esto funcionaba en el código original)
-            print("\n[3/7] Cambiando al contexto del iframe...")
-            self.driver.switch_to.frame(iframe)
-            time.sleep(5)  # Tiempo de espera después de cambiar al iframe
+            log.debug("URL del iframe: %s", iframe_src)
+            self.iframe_src = iframe_src
+            self.isin_actual = extraer_isin(url)
             
-            # NUEVO: Verificar estructura
-            print("[4/7] Verificando estructura del iframe...")
-            self.verificar_estructura_iframe()
+            return self._leer_iframe(iframe)
             
-            # Esperar a que cargue el contenido
-            print("\n[5/7] Esperando que cargue el contenido...")
-            time.sleep(5)
+        except Exception as e:
+            log.exception("Error general: %s", e)
+            self.driver.save_screenshot("error_general.png")
+            return None
+
+    def cambiar_fondo(self, url):
+        """
+        Carga otro fondo dentro del mismo `iframeIsin` reemplazando el ISIN en
+        su src, sin recargar la página contenedora. Si el src no contiene el
+        ISIN actual se hace una carga completa con `scrape_fondo`.
+        """
+        isin = extraer_isin(url)
+        src = getattr(self, "iframe_src", None)
+        anterior = getattr(self, "isin_actual", None)
+        if not isin or not src or not anterior or anterior not in src:
+            return self.scrape_fondo(url)
+
+        try:
+            log.info("Cambiando a fondo %s en el mismo iframe", isin)
+            self.driver.switch_to.default_content()
+            iframe = self.wait.until(EC.presence_of_element_located((By.ID, "iframeIsin")))
+
+            # Marcar el documento actual para no confundirlo con el del nuevo fondo
+            self.driver.switch_to.frame(iframe)
+            self.ejecutar_javascript("window.__fichaAnterior = true;")
+            self.driver.switch_to.default_content()
+
+            nuevo_src = src.replace(anterior, isin)
+            self.ejecutar_javascript("arguments[0].src = arguments[1];", iframe, nuevo_src)
+            self.iframe_src = nuevo_src
+            self.isin_actual = isin
+
+            return self._leer_iframe(iframe)
+
+        except Exception as e:
+            log.warning("No se pudo cambiar de fondo en el iframe (%s), se recarga la página", e)
+            return self.scrape_fondo(url)
+
+    def scrape_fondos(self, urls):
+        """
+        Modo lote: carga la página contenedora una vez y recorre los fondos
+        cambiando de ISIN dentro del mismo iframe. Retorna {url: documentos}.
+        """
+        resultados = {}
+        for i, url in enumerate(urls):
+            resultados[url] = self.scrape_fondo(url) if i == 0 else self.cambiar_fondo(url)
+        return resultados
+
+    def _leer_iframe(self, iframe):
+        """Entra al iframe, espera la documentación y extrae los documentos del fondo cargado."""
+        try:
+            # Cambiar al contexto del iframe en cuanto esté disponible
+            log.debug("[3/7] Cambiando al contexto del iframe...")
+            self.wait.until(EC.frame_to_be_available_and_switch_to_it(iframe))
+            
+            # Esperar a que cargue el contenido (termina apenas aparece la documentación)
+            log.debug("[4/7] Esperando que cargue el contenido...")
+            if not self.esperar_documentacion() and self.ejecutar_javascript("return !!window.__fichaAnterior;"):
+                # El src nuevo nunca reemplazó el documento: lo que hay es del fondo anterior
+                raise FichaAnteriorError("El iframe sigue mostrando el fondo anterior")
+            
+            # Verificar estructura
+            # El volcado de estructura solo sirve para depurar; sin DEBUG activo se omite
+            if debug_enabled():
+                log.debug("[5/7] Verificando estructura del iframe...")
+                self.verificar_estructura_iframe()
             
             # Buscar acordeón
-            print("[6/7] Buscando acordeón de Documentación...")
+            log.debug("[6/7] Buscando acordeón de Documentación...")
             success = self.buscar_acordeon_shadow_dom()
             
             if not success:
-                print("\n⚠ No se pudo encontrar el acordeón")
-                print("❌ No se pudo acceder al acordeón")
+                log.error("No se pudo acceder al acordeón")
                 self.driver.save_screenshot("debug_iframe.png")
-                print("✓ Screenshot guardado como 'debug_iframe.png'")
+                log.info("Screenshot guardado como 'debug_iframe.png'")
                 return None
             
             # Extraer información
-            print("\n[7/7] Extrayendo documentos...")
-            documentos = self.extraer_documentos()
-            
+            log.debug("[7/7] Extrayendo documentos...")
+            return self.extraer_documentos()
+
+        finally:
             # Volver al contexto principal
             self.driver.switch_to.default_content()
-            
-            return documentos
-            
-        except Exception as e:
-            print(f"\n❌ Error general: {e}")
-            import traceback
-            traceback.print_exc()
-            self.driver.save_screenshot("error_general.png")
-            return None
     
     def extraer_documentos(self):
         """
         Extrae los documentos usando JavaScript para manejar Shadow DOM profundo
         """
         try:
-            print("\n   Extrayendo documentos desde Shadow DOM...")
+            log.debug("Extrayendo documentos desde Shadow DOM...")
             
             script = """
+                // URL real del documento a partir del botón o de un enlace dentro del elemento
+                function urlDelBoton(docElement, boton) {
+                    const candidatos = [];
+                    if (boton) {
+                        ['href', 'url', 'link', 'data-url', 'data-href', 'data-link'].forEach(attr => {
+                            const valor = boton.getAttribute(attr);
+                            if (valor) candidatos.push(valor);
+                        });
+                        ['href', 'url', 'link', 'documentUrl'].forEach(prop => {
+                            if (typeof boton[prop] === 'string') candidatos.push(boton[prop]);
+                        });
+                        const anclaInterna = boton.shadowRoot && boton.shadowRoot.querySelector('a[href]');
+                        if (anclaInterna) candidatos.push(anclaInterna.getAttribute('href'));
+                    }
+                    const ancla = docElement.querySelector('a[href]');
+                    if (ancla) candidatos.push(ancla.getAttribute('href'));
+
+                    const valido = candidatos.find(c => c && c !== '#' && !c.startsWith('javascript'));
+                    return valido ? new URL(valido, document.baseURI).href : null;
+                }
+
+                // Recorre el modelo de datos de entity-funds-dm buscando objetos {nombre, url}
+                function urlsDelModelo(entityFunds) {
+                    const encontrados = {};
+                    const vistos = new Set();
+                    const esUrl = v => typeof v === 'string' && /(\\.pdf|documento|download|descarga)/i.test(v) && /^(https?:)?\\//.test(v);
+                    const esNombre = k => /nombre|name|titulo|title|descripcion|description/i.test(k);
+
+                    function visitar(valor, profundidad) {
+                        if (!valor || typeof valor !== 'object' || profundidad > 6 || vistos.has(valor)) return;
+                        if (valor instanceof Node) return;
+                        vistos.add(valor);
+                        if (Array.isArray(valor)) {
+                            valor.forEach(v => visitar(v, profundidad + 1));
+                            return;
+                        }
+                        const claves = Object.keys(valor);
+                        const url = claves.map(k => valor[k]).find(esUrl);
+                        const claveNombre = claves.find(k => esNombre(k) && typeof valor[k] === 'string');
+                        if (url && claveNombre) {
+                            encontrados[valor[claveNombre].trim().toLowerCase()] = new URL(url, document.baseURI).href;
+                        }
+                        claves.forEach(k => visitar(valor[k], profundidad + 1));
+                    }
+
+                    // Polymer/Cells guarda las propiedades en __data
+                    [entityFunds.__data, entityFunds].forEach(raiz => {
+                        if (!raiz) return;
+                        Object.keys(raiz).forEach(k => {
+                            try { visitar(raiz[k], 0); } catch (e) {}
+                        });
+                    });
+                    return encontrados;
+                }
+
                 function extraerDocumentosProfundo() {
                     let documentos = [];
                     
@@ -343,6 +527,8 @@ class BBVAFondosScraper:
                                          
                         if (!docSection) return documentos;
                         
+                        const modelo = urlsDelModelo(entityFunds);
+                        
                         // Paso 2: Buscar categorías de documentos
                         const categorias = docSection.querySelectorAll('.titulos-documentacion');
                         
@@ -366,11 +552,15 @@ class BBVAFondosScraper:
                                         const botonDescarga = docElement.querySelector('bbva-button-action');
                                         const tieneBoton = !!botonDescarga;
                                         
+                                        const url = urlDelBoton(docElement, botonDescarga) ||
+                                                    modelo[nombre.toLowerCase()] || null;
+                                        
                                         documentos.push({
                                             categoria: nombreCategoria,
                                             nombre: nombre,
                                             fecha: fecha,
-                                            descargable: tieneBoton
+                                            descargable: tieneBoton,
+                                            url: url
                                         });
                                     }
                                 });
@@ -390,7 +580,7 @@ class BBVAFondosScraper:
             documentos = self.ejecutar_javascript(script)
             
             if documentos and len(documentos) > 0:
-                print(f"\n   ✓ Total de documentos encontrados: {len(documentos)}")
+                log.info("Total de documentos encontrados: %d", len(documentos))
                 
                 # Mostrar resumen por categoría
                 categorias = {}
@@ -400,71 +590,142 @@ class BBVAFondosScraper:
                         categorias[cat] = []
                     categorias[cat].append(doc)
                 
-                print("\n" + "="*60)
-                print("DOCUMENTOS EXTRAÍDOS")
-                print("="*60)
-                
                 for cat, docs in categorias.items():
-                    print(f"\n📁 {cat} ({len(docs)} documentos)")
+                    log.debug("📁 %s (%d documentos)", cat, len(docs))
                     for doc in docs:
                         icono = "📄" if doc.get('descargable') else "📃"
-                        print(f"   {icono} {doc['nombre']} - {doc['fecha']}")
+                        log.debug("   %s %s - %s", icono, doc['nombre'], doc['fecha'], extra=fields(url=doc.get('url')))
                 
+                self.completar_urls_de_red(documentos)
                 return documentos
             else:
-                print("   ⚠ No se encontraron documentos")
+                log.warning("No se encontraron documentos")
                 return []
             
         except Exception as e:
-            print(f"   ❌ Error extrayendo documentos: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("Error extrayendo documentos: %s", e)
             return []
     
+    def urls_pdf_de_red(self):
+        """URLs de PDF que el iframe ya pidió, según las entradas de Resource Timing del navegador."""
+        script = """
+            return performance.getEntriesByType('resource')
+                .map(entrada => entrada.name)
+                .filter(nombre => /\\.pdf($|[?#])/i.test(nombre));
+        """
+        try:
+            return self.ejecutar_javascript(script) or []
+        except Exception:
+            return []
+
+    def completar_urls_de_red(self, documentos):
+        """
+        Para los documentos sin URL, intenta asociar un PDF visto en la red cuyo
+        nombre de archivo contenga el nombre del documento.
+        """
+        pendientes = [doc for doc in documentos if not doc.get('url')]
+        if not pendientes:
+            return
+        urls = self.urls_pdf_de_red()
+        for doc in pendientes:
+            clave = clave_nombre(doc['nombre'])
+            doc['url'] = next((u for u in urls if clave and clave in clave_nombre(u)), None)
+
     def guardar_json(self, documentos, filename="documentos.json"):
         """Guarda la información de los documentos en un archivo JSON"""
         with open(filename, 'w', encoding='utf-8') as f:
             json.dump(documentos, f, ensure_ascii=False, indent=2)
-        print(f"\n✓ Información guardada en {filename}")
+        log.info("Información guardada en %s", filename)
     
     def cerrar(self):
-        """Cierra el navegador"""
-        print("\n" + "=" * 60)
-        print("Cerrando navegador...")
-        self.driver.quit()
-        print("✓ Proceso finalizado")
-        print("=" * 60)
+        """Devuelve el navegador al pool para que otro scraper lo reutilice"""
+        log.debug("Liberando navegador...")
+        self.pool.release(self.driver)
+        log.info("Proceso finalizado")
+
+
+class BBVAAdapter(AdminAdapter):
+    """
+    BBVA: una sola sesión Selenium recorre todos los fondos cambiando de ISIN
+    dentro del mismo iframe; los PDF se bajan luego por HTTP en paralelo.
+    """
+
+    harvest = "selenium"
+    batch = True
+    static_fetch = False
+
+    def harvest_links(self, url, prefetched=None, tiers=None):
+        scraper = BBVAFondosScraper(profile=self.profile)
+        try:
+            return documentos_a_links(scraper.scrape_fondos([url]).get(url) or [])
+        finally:
+            scraper.cerrar()
+
+    def crawl_batch(self, admin, paginas, journal=None, snapshots=None):
+        """
+        La página contenedora se carga una vez para todos los fondos; los que
+        tienen instantánea vigente no abren el navegador.
+        """
+        links_por_url = {}
+        if snapshots is not None:
+            for link, _ in paginas:
+                links = snapshots.get(link)
+                if links is not None:
+                    links_por_url[link] = links
+
+        faltantes = [link for link, _ in paginas if link not in links_por_url]
+        if faltantes:
+            scraper = BBVAFondosScraper(profile=self.profile)
+            try:
+                documentos_por_url = scraper.scrape_fondos(faltantes)
+            finally:
+                scraper.cerrar()
+            for link in faltantes:
+                links = documentos_a_links(documentos_por_url.get(link) or [])
+                links_por_url[link] = links
+                if snapshots is not None and links:
+                    snapshots.put(link, links, admin=admin)
+
+        # Con las URLs reales resueltas, cada fondo se ordena por fecha/nombre y se
+        # descarga por HTTP en paralelo, sin clics en el navegador
+        descargas = [(links_por_url[link], fondo, year, month)
+                     for link, tareas in paginas for fondo, year, month in tareas]
+
+        with ThreadPoolExecutor(max_workers=BBVA_DOWNLOAD_WORKERS) as executor:
+            return list(executor.map(
+                lambda descarga: process_fund(descarga[0], admin, *descarga[1:], journal=journal,
+                                              adelantar=self.adelantar),
+                descargas,
+            ))
 
 
 # Ejemplo de uso
 if __name__ == "__main__":
     url = "https://www.bbvaassetmanagement.com/co/fondos/?BBVFDIGCB/Fondo-de-Inversión-Colectiva-Abierto-FONDO-BBVA-DIGITAL"
     
-    scraper = BBVAFondosScraper(headless=False)
+    configure_logging(verbose=True)
+    scraper = BBVAFondosScraper(profile="visible")
     
     try:
         documentos = scraper.scrape_fondo(url)
         
         if documentos:
-            print("\n" + "=" * 60)
-            print("EXTRACCIÓN COMPLETADA CON ÉXITO")
-            print("=" * 60)
+            log.info("Extracción completada con éxito")
             
             # Guardar en JSON
             scraper.guardar_json(documentos)
             
-            print(f"\n✓ Total: {len(documentos)} documentos extraídos")
+            log.info("Total: %d documentos extraídos", len(documentos))
             
         else:
-            print("\n❌ No se pudieron extraer documentos")
-            print("Revisa los screenshots generados para debugging")
+            log.error("No se pudieron extraer documentos")
+            log.info("Revisa los screenshots generados para debugging")
             
     except KeyboardInterrupt:
-        print("\n\n⚠ Proceso interrumpido por el usuario")
+        log.warning("Proceso interrumpido por el usuario")
     except Exception as e:
-        print(f"\n❌ Error en la ejecución: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Error en la ejecución: %s", e)
     finally:
         input("\nPresiona Enter para cerrar el navegador...")
-        scraper.cerrar()
\ No newline at end of file
+        scraper.cerrar()
+        close_all_pools()
\ No newline at end of file
@@ -0,0 +1,166 @@
+"""
+Benchmark del ranking de enlaces (`Scraping.filter_links_with_ai`).
+
+Reproduce listas de anclajes grabadas (benchmarks/fixtures/*.json) contra los
+casos etiquetados de benchmarks/expected.json y reporta enlaces/s, tiempo por
+fondo y precisión de enlace (el "PE" del README).
+
+Uso:
+    python benchmarks/bench_ranking.py [--repeat N] [--verbose] [--batch]
+    python benchmarks/bench_ranking.py --record <admin> <url> <nombre_fixture> [--from-snapshot]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+EXPECTED_FILE = os.path.join(BENCH_DIR, "expected.json")
+
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from Scraping import Scraping  # noqa: E402
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_cases(path=EXPECTED_FILE):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def rank(links, case):
+    """Elige el mejor enlace igual que el crawler: el primero del ranking top-K."""
+    return Scraping().rank_links(links, case["admin"], case["fondo"], case["year"], case["month"]).best
+
+
+def run(cases, repeat=1, verbose=False):
+    fixtures = {}
+    total_links = 0
+    timings = []
+    hits = 0
+
+    for case in cases:
+        if case["fixture"] not in fixtures:
+            fixtures[case["fixture"]] = load_fixture(case["fixture"])["links"]
+        links = fixtures[case["fixture"]]
+
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            best = rank(links, case)
+            timings.append(time.perf_counter() - start)
+            total_links += len(links)
+
+        correct = best == case["expected"]
+        hits += correct
+        if verbose or not correct:
+            mark = "✓" if correct else "✗"
+            print(f" {mark} {case['admin']}/{case['fondo']} {case['month']} {case['year']}")
+            if not correct:
+                print(f"     esperado: {case['expected']}")
+                print(f"     obtenido: {best}")
+
+    return _stats(cases, hits, total_links, sum(timings), len(timings))
+
+
+def run_batch(cases, repeat=1, verbose=False):
+    """
+    Como `run`, pero cada fixture se rankea en lote con `Scraping.rank_many`
+    (todas sus consultas repetidas `repeat` veces), como una página que
+    sirve a muchos fondos.
+    """
+    by_fixture = {}
+    for case in cases:
+        by_fixture.setdefault(case["fixture"], []).append(case)
+
+    total_links = 0
+    elapsed = 0.0
+    queries_run = 0
+    hits = 0
+    for fixture, fixture_cases in by_fixture.items():
+        links = load_fixture(fixture)["links"]
+        queries = [(c["admin"], c["fondo"], c["year"], c["month"]) for c in fixture_cases] * repeat
+
+        start = time.perf_counter()
+        rankings = Scraping().rank_many(links, queries)
+        elapsed += time.perf_counter() - start
+        total_links += len(links) * len(queries)
+        queries_run += len(queries)
+
+        for case, ranking in zip(fixture_cases, rankings):
+            correct = ranking.best == case["expected"]
+            hits += correct
+            if verbose or not correct:
+                print(f" {'✓' if correct else '✗'} {case['admin']}/{case['fondo']} {case['month']} {case['year']}")
+
+    return _stats(cases, hits, total_links, elapsed, queries_run)
+
+
+def _stats(cases, hits, total_links, elapsed, runs):
+    return {
+        "cases": len(cases),
+        "links_per_sec": total_links / elapsed if elapsed else 0.0,
+        "ms_per_fund": 1000 * elapsed / runs if runs else 0.0,
+        "precision": hits / len(cases) if cases else 0.0,
+    }
+
+
+def record(admin, url, name, from_snapshot=False):
+    """
+    Cosecha la página en vivo (o toma su instantánea guardada por el crawler)
+    y la guarda como fixture para futuras corridas.
+    """
+    if from_snapshot:
+        from snapshot_cache import SnapshotCache
+
+        links = SnapshotCache().get(url, ignore_ttl=True)
+        if links is None:
+            sys.exit(f" No hay instantánea guardada para {url}")
+        source = "snapshot"
+    else:
+        from adapters import get_adapter
+
+        links = get_adapter(admin).harvest_links(url)
+        source = "live"
+
+    path = os.path.join(FIXTURES_DIR, name if name.endswith(".json") else f"{name}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"admin": admin, "url": url, "source": source, "links": links}, f, ensure_ascii=False, indent=2)
+    print(f" Fixture guardado en {path} ({len(links)} enlaces)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del ranking de fichas técnicas")
+    parser.add_argument("--repeat", type=int, default=5, help="repeticiones por caso para estabilizar tiempos")
+    parser.add_argument("--verbose", action="store_true", help="mostrar también los casos acertados")
+    parser.add_argument("--expected", default=EXPECTED_FILE, help="archivo de casos etiquetados")
+    parser.add_argument("--record", nargs=3, metavar=("ADMIN", "URL", "NOMBRE"),
+                        help="grabar un nuevo fixture desde la página en vivo")
+    parser.add_argument("--from-snapshot", action="store_true",
+                        help="con --record, usar la instantánea del crawler en lugar de la página en vivo")
+    parser.add_argument("--batch", action="store_true",
+                        help="rankear cada fixture en lote con Scraping.rank_many")
+    args = parser.parse_args()
+
+    if args.record:
+        record(*args.record, from_snapshot=args.from_snapshot)
+        return
+
+    if args.batch:
+        stats = run_batch(load_cases(args.expected), repeat=args.repeat, verbose=args.verbose)
+    else:
+        stats = run(load_cases(args.expected), repeat=args.repeat, verbose=args.verbose)
+    print(f" Casos: {stats['cases']}")
+    print(f" Enlaces/s: {stats['links_per_sec']:.0f}")
+    print(f" Tiempo por fondo: {stats['ms_per_fund']:.2f} ms")
+    print(f" Precisión de enlace: {stats['precision']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Perfil del tiempo de importación de `crawlai`.
+
+Ejecuta `python -X importtime -c "import crawlai"` en un proceso limpio,
+reporta el tiempo total y los módulos más costosos, y verifica que las
+dependencias pesadas (navegadores, clientes HTTP, adaptadores) no se carguen
+al arrancar. Sale con código 1 si alguna se cuela o si se supera `--max-ms`,
+para detectar regresiones del arranque.
+
+Uso:
+    python benchmarks/bench_startup.py [--repeat N] [--top N] [--max-ms MS] [--module crawlai]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+# Solo deben cargarse cuando el rastreo los usa
+HEAVY_MODULES = [
+    "selenium", "webdriver_manager", "playwright", "pydantic", "requests", "httpx", "bs4",
+    "http_session", "http_fetch", "bbva", "itau_scraper",
+]
+
+
+def import_profile(module):
+    """
+    Filas (propio_us, acumulado_us, nivel, módulo) de una importación en frío.
+    El nivel es la profundidad de anidamiento que reporta -X importtime.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_DIR, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        sys.exit(f" No se pudo importar {module}:\n{completed.stderr}")
+
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        level = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(self_us), int(cumulative_us), level, name.strip()))
+    return rows
+
+
+def module_rows(rows, module):
+    """
+    Filas que pertenecen a la importación de `module`: -X importtime escribe los
+    hijos antes que el padre, así que son las anteriores con mayor nivel. Lo que
+    carga el intérprete al iniciar (site, .pth) queda fuera.
+    """
+    index = next(i for i, (_, _, level, name) in enumerate(rows) if name == module and level == 0)
+    start = index
+    while start > 0 and rows[start - 1][2] > 0:
+        start -= 1
+    return rows[start:index + 1]
+
+
+def run(module, repeat=5):
+    """Importa `module` `repeat` veces y se queda con la corrida más rápida."""
+    best = None
+    for _ in range(repeat):
+        rows = module_rows(import_profile(module), module)
+        total = rows[-1][1]
+        if best is None or total < best[0]:
+            best = (total, rows)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perfil del tiempo de importación del crawler")
+    parser.add_argument("--module", default="crawlai", help="módulo a importar")
+    parser.add_argument("--repeat", type=int, default=5, help="importaciones en frío; se reporta la más rápida")
+    parser.add_argument("--top", type=int, default=10, help="módulos más costosos a mostrar")
+    parser.add_argument("--max-ms", type=float, help="fallar si la importación tarda más de estos milisegundos")
+    args = parser.parse_args()
+
+    total_us, rows = run(args.module, repeat=args.repeat)
+    loaded = {name.split(".")[0] for _, _, _, name in rows}
+    heavy = [name for name in HEAVY_MODULES if name in loaded]
+
+    print(f" Importar {args.module}: {total_us / 1000:.1f} ms")
+    print(" Módulos más costosos (acumulado):")
+    for _, cumulative, _, name in sorted(rows[:-1], key=lambda row: row[1], reverse=True)[:args.top]:
+        print(f"   {cumulative / 1000:8.1f} ms  {name}")
+
+    failed = False
+    if heavy:
+        print(f" Dependencias pesadas cargadas al arrancar: {', '.join(heavy)}")
+        failed = True
+    if args.max_ms is not None and total_us / 1000 > args.max_ms:
+        print(f" Supera el límite de {args.max_ms:g} ms")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,203 +1,243 @@
 import os
 import sys
-import requests
-import platform
+import argparse
 import time
-from pydantic import BaseModel
+from functools import partial
 from Extraer import LinkExtractor
-from Scraping import Scraping
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
-from itau_scraper import get_itau_links
-from playwright.sync_api import sync_playwright
-
-class Url(BaseModel):
-    url: str
+from Scraping import Scraping, normalization_cache_stats, MESES
+from driver_pool import get_driver_pool, pool_stats, close_all_pools
+from scheduler import CrawlScheduler
+from adapters import get_adapter, adapter_path
+from logger import get_logger, configure_logging
+from run_journal import RunJournal
+from snapshot_cache import SnapshotCache, SNAPSHOT_TTL_HOURS
 
-location = os.path.dirname(os.path.abspath(__file__))
-output = os.path.join(location, "output")
-result_counter = 0
-
-parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-sys.path.append(parent_dir)
+# Arranque liviano: selenium, webdriver_manager, Playwright, requests/httpx y
+# los módulos de cada administradora se importan recién al usarse (ver
+# benchmarks/bench_startup.py). pydantic solo hace falta para `Url`.
 
-ADMINS_ESPECIALES = []
 
+def __getattr__(name):
+    if name == "Url":
+        from pydantic import BaseModel
 
-def process_result(links, admin, fondo, year, month):
-    scraping = Scraping()
-    if admin in ADMINS_ESPECIALES:
-        return scraping.filter_links_with_ai(links, admin, fondo, year, month, adelantar=True)
-    else:
-        return scraping.filter_links_with_ai(links, admin, fondo, year, month)
-
-
-def get_chrome_options(download_dir=None):
-    options = Options()
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_argument("--disable-infobars")
-    options.add_argument("--start-maximized")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--window-size=1920,1080")
-
-    if download_dir:
-        prefs = {
-            "download.default_directory": os.path.abspath(download_dir),
-            "download.prompt_for_download": False,
-            "download.directory_upgrade": True,
-            "plugins.always_open_pdf_externally": True,
-        }
-        options.add_experimental_option("prefs", prefs)
-
-    system = platform.system().lower()
-    if system == "windows":
-        chrome_path = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
-        if not os.path.exists(chrome_path):
-            chrome_path = r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe"
-        if os.path.exists(chrome_path):
-            options.binary_location = chrome_path
-    else:
-        options.binary_location = os.environ.get("CHROME_BIN", "/usr/bin/chromium-browser")
+        class Url(BaseModel):
+            url: str
 
-    return options
+        globals()["Url"] = Url
+        return Url
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
-def create_output_dir(admin, year, month, scraping_instance):
-    admin_clean = "".join(c for c in admin if c.isalnum() or c.isspace())
-    admin_words = admin_clean.title().split()
-    admin_formatted = "".join(admin_words)
-
-    month_variations = scraping_instance.find_month_variations(month)
-    month_numeric = next((m for m in month_variations if m.isdigit() and len(m) == 2), None)
-    month_final = month_numeric or month
-
-    output_dir = os.path.join("Fichas tecnicas", f"{admin_formatted}_{year}", month_final)
-    os.makedirs(output_dir, exist_ok=True)
-
-    return output_dir
-
-
-def crawl_with_selenium(url, admin, fondo, year, month):
-    is_itau = admin.lower().strip() == "itau"
-    headless_mode = not is_itau
-    options = get_chrome_options()
-
-    if not headless_mode:
-        print(" Ejecutando sin modo headless (Itau detectado).")
-        try:
-            options.arguments.remove("--headless=new")
-        except ValueError:
-            pass
+location = os.path.dirname(os.path.abspath(__file__))
+output = os.path.join(location, "output")
+result_counter = 0
 
-    if not is_itau:
-        if platform.system().lower() == "windows":
-            driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-        else:
-            driver_path = os.environ.get("CHROMEDRIVER_PATH", "/usr/bin/chromedriver")
-            driver = webdriver.Chrome(service=Service(driver_path), options=options)
-    else:
-        driver = None
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
 
+log = get_logger("crawler")
+
+
+def group_by_url(resultados):
+    """
+    Agrupa las tuplas (admin, fondo, link, year, month) por URL conservando el
+    orden de aparición: cada página queda con su lista de tareas (fondo, year, month).
+    """
+    grupos = {}
+    for admin, fondo, link, year, month in resultados:
+        grupos.setdefault((admin, link), []).append((fondo, year, month))
+    return [(admin, link, tareas) for (admin, link), tareas in grupos.items()]
+
+
+def parse_period(texto):
+    """'enero 2024' -> ('enero', '2024'); el mes se valida contra los nombres en español."""
+    partes = texto.split()
+    if len(partes) != 2 or not partes[1].isdigit():
+        raise ValueError(f"Periodo inválido: '{texto}' (se espera '<mes> <año>')")
+    mes = Scraping().normalize_text(partes[0]).strip().lower()
+    if mes not in MESES:
+        raise ValueError(f"Mes no reconocido: '{partes[0]}'")
+    return mes, partes[1]
+
+
+def expand_periods(tokens):
+    """
+    Periodos (month, year) a rastrear a partir de los argumentos posicionales:
+    `agosto 2025` es un solo mes y `enero 2024..septiembre 2025` un rango inclusivo.
+    """
+    texto = " ".join(tokens)
+    if ".." not in texto:
+        # Un solo mes se pasa tal como llegó, igual que antes del modo rango
+        if len(tokens) != 2:
+            raise ValueError(f"Periodo inválido: '{texto}' (se espera '<mes> <año>')")
+        return [(tokens[0], tokens[1])]
+
+    inicio, fin = (parse_period(parte) for parte in texto.split("..", 1))
+    desde = int(inicio[1]) * 12 + MESES.index(inicio[0])
+    hasta = int(fin[1]) * 12 + MESES.index(fin[0])
+    if hasta < desde:
+        raise ValueError(f"El rango '{texto}' termina antes de empezar")
+    return [(MESES[i % 12], str(i // 12)) for i in range(desde, hasta + 1)]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Descarga las fichas técnicas del mes (o rango de meses) indicado",
+        epilog="Ejemplos: python crawlai.py agosto 2025 | python crawlai.py enero 2024..septiembre 2025",
+    )
+    parser.add_argument("periodo", nargs="+",
+                        help="mes y año a rastrear (ej. agosto 2025) o rango inclusivo (ej. enero 2024..septiembre 2025)")
+    parser.add_argument("--verbose", action="store_true",
+                        help="escribir en consola el detalle de depuración de todos los fondos")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="reintentar solo los fondos que fallaron en ejecuciones anteriores del periodo")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="ignorar la bitácora y rastrear todos los fondos desde cero")
+    parser.add_argument("--offline", action="store_true",
+                        help="rankear solo con las instantáneas guardadas, sin navegador ni descargas")
+    parser.add_argument("--refresh", action="store_true",
+                        help="invalidar las instantáneas de las páginas a rastrear y cosecharlas de nuevo")
+    parser.add_argument("--snapshot-ttl", type=float, default=SNAPSHOT_TTL_HOURS, metavar="HORAS",
+                        help=f"vigencia de las instantáneas de enlaces (por defecto {SNAPSHOT_TTL_HOURS:g} h)")
+    parser.add_argument("--plan", action="store_true",
+                        help="solo listar las páginas y fondos que se rastrearían, sin navegador ni red")
+    args = parser.parse_args(argv)
+    if args.offline and args.refresh:
+        parser.error("--offline y --refresh no se pueden combinar")
     try:
-        print(f" Intentando abrir: {url}")
-
-        all_links = []
-
-        if is_itau:
-            print("[INFO] Activando scraper especial para Itau...")
-            itau_links = get_itau_links(url)
-            for href in itau_links:
-                all_links.append({"href": href, "text": "Fichas técnicas Itau", "title": "Ficha Itau"})
-        else:
-            driver.get(url)
-            elements = driver.find_elements(By.TAG_NAME, "a")
-            for el in elements:
-                href = el.get_attribute("href")
-                text = el.text
-                title = el.get_attribute("title")
-                if href and ".pdf" in href.lower():
-                    all_links.append({"href": href, "text": text, "title": title})
-
-        if not all_links:
-            print(f" {fondo} ({admin}) - No se encontraron enlaces en la página")
-            return
-
-        links = process_result(all_links, admin, fondo, year, month)
-        if not links:
-            print(f" {fondo} ({admin}) - No se encontraron links válidos tras el filtrado AI")
-            return
-
-        best_link = links[-1]
-        print(f" {fondo} ({admin}) - Links encontrados: {len(links)}")
-        print("   → Mejor opción:", best_link)
-
-        scraping = Scraping()
-        output_dir = create_output_dir(admin, year, month, scraping)
-        safe_fondo = "".join(c for c in fondo if c.isalnum() or c in (" ", "_", "-")).rstrip()
-        filename = f"{safe_fondo}.pdf"
-        filepath = os.path.join(output_dir, filename)
-
-        # --- Descargar PDF ---
-        if is_itau:
-            print("[INFO] Descargando PDF (Itaú) usando Playwright...")
-
-            try:
-                with sync_playwright() as p:
-                    browser = p.chromium.launch(headless=True)
-                    context = browser.new_context(accept_downloads=True)
-                    page = context.new_page()
-
-                    page.goto(best_link, wait_until="networkidle")
-                    print(f" Abriendo PDF: {best_link}")
-
-                    with page.expect_download() as download_info:
-                        # Forzar impresión (algunos visores generan descarga)
-                        page.evaluate("window.print()")
-
-                    download = download_info.value
-                    download.save_as(filepath)
-
-                    print(f" ✅ Archivo guardado correctamente en: {filepath}")
-                    browser.close()
-
-            except Exception as e:
-                print(f" Error al descargar con Playwright (Itaú): {e}")
-
-        else:
-            scraping.download_pdf(best_link, output_dir=output_dir, filename=filename)
-
-    except Exception as e:
-        print(f" Error en {fondo} ({admin}) - {str(e)}")
-
-    finally:
-        if driver:
-            driver.quit()
+        args.periodos = expand_periods(args.periodo)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+
+def build_jobs(paginas, static_links, tiers, journal=None, snapshots=None, offline=False):
+    """
+    Un trabajo por página, salvo las administradoras con modo lote, que van en
+    un solo trabajo. En modo offline no hay sesiones de navegador: todas las
+    páginas se evalúan desde sus instantáneas.
+    """
+    jobs = []
+    lotes = {}
+    for admin, link, tareas in paginas:
+        adapter = get_adapter(admin)
+        if adapter.batch and not offline:
+            lotes.setdefault((adapter.name, admin), []).append((link, tareas))
+            continue
+        jobs.append((link, partial(adapter.crawl_page, link, admin, tareas,
+                                   prefetched=static_links.get(link), tiers=tiers, journal=journal,
+                                   snapshots=snapshots, offline=offline)))
+
+    for (key, admin), paginas_admin in lotes.items():
+        jobs.append((paginas_admin[0][0], partial(get_adapter(key).crawl_batch, admin, paginas_admin,
+                                                  journal=journal, snapshots=snapshots)))
+    return jobs
+
+
+def plan_source(link, snapshots, offline=False, refresh=False):
+    """De dónde saldrían los enlaces de la página: instantánea vigente, cosecha o nada (offline)."""
+    age = snapshots.age_hours(link)
+    if age is None:
+        return "sin instantánea" if offline else "cosechar"
+    if refresh:
+        return "cosechar (--refresh)"
+    if offline or age <= snapshots.ttl_hours:
+        return f"instantánea ({age:.1f} h)"
+    return f"cosechar (instantánea de {age:.1f} h vencida)"
+
+
+def print_plan(paginas, snapshots, offline=False, refresh=False, started=None):
+    """
+    Lista lo que se rastrearía sin importar los adaptadores ni abrir
+    navegadores: solo el JSON de fondos, la bitácora y el índice de instantáneas.
+    """
+    for admin, link, tareas in paginas:
+        fuente = plan_source(link, snapshots, offline=offline, refresh=refresh)
+        print(f" {admin:<30} {adapter_path(admin):<28} {len(tareas):>4}  {fuente:<34} {link}")
+    total = sum(len(tareas) for _, _, tareas in paginas)
+    print(f" {total} fondos/periodos en {len(paginas)} páginas", end="")
+    if started is not None:
+        print(f" (plan en {(time.perf_counter() - started) * 1000:.0f} ms)")
+    else:
+        print()
 
 
 def main():
-    if len(sys.argv) < 3:
-        print(" Uso: python nombre_archivo.py <mes> <año>")
-        print("   Ejemplo: python crawler.py agosto 2025")
-        sys.exit(1)
-
-    month = sys.argv[1]
-    year = sys.argv[2]
+    started = time.perf_counter()
+    args = parse_args()
+    configure_logging(verbose=args.verbose)
 
-    print(f" Parámetros recibidos → Mes: {month}, Año: {year}")
+    periodos = args.periodos
+    if len(periodos) == 1:
+        log.info("Parámetros recibidos → Mes: %s, Año: %s", *periodos[0])
+    else:
+        log.info("Parámetros recibidos → %d periodos, de %s %s a %s %s", len(periodos), *periodos[0], *periodos[-1])
 
     extraer = LinkExtractor("bbva.json")
-    resultados = extraer.extract_links()
-
-    if resultados:
-        print(f" Se encontraron {len(resultados)} fondos para rastrear")
-        for admin, fondo, link in resultados:
-            crawl_with_selenium(link, admin, fondo, year, month)
-    else:
-        print(" No se encontraron URLs para rastrear")
+    fondos = extraer.extract_links()
+
+    # Una tarea por fondo y periodo; en modo rango cada página se cosecha una
+    # sola vez y se evalúa contra todos los periodos, en orden
+    # El modo offline solo rankea: no toca la bitácora de descargas; --plan solo la lee
+    journal = None if args.offline else RunJournal(readonly=args.plan)
+    resultados = []
+    for month, year in periodos:
+        pendientes = fondos
+        if journal is not None and (args.retry_failed or not args.no_resume):
+            pendientes = journal.pending(fondos, year, month, retry_failed=args.retry_failed)
+        resultados.extend((admin, fondo, link, year, month) for admin, fondo, link in pendientes)
+
+    if not resultados:
+        if journal is not None:
+            journal.close()
+        log.warning("No se encontraron URLs para rastrear")
+        return
+
+    paginas = group_by_url(resultados)
+    log.info("Se encontraron %d fondos para rastrear en %d páginas distintas", len(resultados), len(paginas))
+
+    snapshots = SnapshotCache(ttl_hours=args.snapshot_ttl)
+    if args.plan:
+        if journal is not None:
+            journal.close()
+        print_plan(paginas, snapshots, offline=args.offline, refresh=args.refresh, started=started)
+        return
+
+    from http_fetch import TierMemory, fetch_static_links
+    from http_session import close_session
+
+    scheduler = CrawlScheduler()
+    # Solo se importan los adaptadores de las administradoras presentes
+    adapters = {admin: get_adapter(admin) for admin in dict.fromkeys(admin for admin, _, _ in paginas)}
+    # Un driver por worker para que ningún hilo espere navegador, en cada perfil en uso
+    for profile in dict.fromkeys(adapter.profile for adapter in adapters.values() if adapter.harvest == "selenium"):
+        get_driver_pool(profile, size=scheduler.max_workers)
+
+    if args.refresh:
+        snapshots.invalidate([link for _, link, _ in paginas])
+
+    # Ruta rápida: GET asíncrono para las páginas que traen los PDF en el HTML
+    tiers = TierMemory()
+    static_links = {}
+    if not args.offline:
+        static_links = fetch_static_links(
+            [link for admin, link, _ in paginas
+             if adapters[admin].static_fetch and not snapshots.is_fresh(link)],
+            tiers,
+        )
+
+    jobs = build_jobs(paginas, static_links, tiers, journal=journal, snapshots=snapshots, offline=args.offline)
+    try:
+        summary = scheduler.run(jobs)
+    finally:
+        stats = pool_stats()
+        close_all_pools()
+        close_session()
+        if journal is not None:
+            journal.close()
+    summary.finish(navegadores=stats, cache_normalizacion=normalization_cache_stats())
+    summary.report()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import threading
+
+from logger import get_logger
+
+log = get_logger("downloads")
+
+DOWNLOAD_CACHE_FILE = os.path.join("Fichas tecnicas", ".download_cache.json")
+
+
+def sha256_file(path, chunk_size=64 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _path_key(path):
+    return os.path.relpath(path).replace(os.sep, "/")
+
+
+class DownloadCache:
+    """
+    Metadatos de descargas previas: ETag, Last-Modified y SHA-256 por URL, y
+    SHA-256 + URL de origen por archivo de salida. Se guarda junto a las
+    fichas para que el flujo mensual lo conserve entre ejecuciones; solo se
+    reescribe cuando algo cambia.
+    """
+
+    def __init__(self, path=DOWNLOAD_CACHE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = {"urls": {}, "paths": {}}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self._data["urls"].update(data.get("urls", {}))
+                self._data["paths"].update(data.get("paths", {}))
+            except (OSError, ValueError):
+                pass
+
+    def conditional_headers(self, url, filepath):
+        """Cabeceras If-None-Match/If-Modified-Since, solo si el archivo local proviene de esa URL."""
+        entry = self._data["urls"].get(url)
+        path_entry = self._data["paths"].get(_path_key(filepath))
+        if not entry or not path_entry or path_entry.get("url") != url or not os.path.exists(filepath):
+            return {}
+        if path_entry.get("sha256") != entry.get("sha256"):
+            return {}
+
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def known_hash(self, filepath):
+        """SHA-256 del archivo de salida; usa el registrado si el tamaño no cambió."""
+        if not os.path.exists(filepath):
+            return None
+        entry = self._data["paths"].get(_path_key(filepath))
+        if entry and entry.get("size") == os.path.getsize(filepath):
+            return entry.get("sha256")
+        return sha256_file(filepath)
+
+    def record(self, url, filepath, sha256, etag=None, last_modified=None):
+        url_entry = {"sha256": sha256, "etag": etag, "last_modified": last_modified}
+        path_entry = {"sha256": sha256, "url": url, "size": os.path.getsize(filepath)}
+        key = _path_key(filepath)
+        with self._lock:
+            if self._data["urls"].get(url) == url_entry and self._data["paths"].get(key) == path_entry:
+                return
+            self._data["urls"][url] = url_entry
+            self._data["paths"][key] = path_entry
+            self._save()
+
+    def finalize(self, url, part_path, filepath, etag=None, last_modified=None):
+        """
+        Cierra una descarga completa en `part_path`: si tiene el mismo SHA-256
+        que `filepath` se descarta y el archivo no se toca; si no, lo reemplaza.
+        Registra la descarga y retorna {'path', 'status'} con status
+        'downloaded' o 'unchanged'.
+        """
+        new_hash = sha256_file(part_path)
+        if new_hash == self.known_hash(filepath):
+            os.remove(part_path)
+            status = "unchanged"
+            log.info("Sin cambios (mismo contenido): %s", filepath)
+        else:
+            os.replace(part_path, filepath)
+            status = "downloaded"
+            log.info("Descargado: %s", filepath)
+
+        self.record(url, filepath, new_hash, etag=etag, last_modified=last_modified)
+        return {"path": filepath, "status": status}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, indent=2, sort_keys=True, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_download_cache():
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = DownloadCache()
+        return _default_cache
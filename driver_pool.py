@@ -0,0 +1,371 @@
+import os
+import platform
+import threading
+import time
+from contextlib import contextmanager
+
+from logger import get_logger
+
+# selenium y webdriver_manager se importan al lanzar el primer navegador:
+# planificar o rankear desde instantáneas no los carga
+
+DEFAULT_POOL_SIZE = int(os.environ.get("DRIVER_POOL_SIZE", "1"))
+
+# Ruta del chromedriver resuelta por webdriver_manager (Windows); se reutiliza
+# entre ejecuciones mientras el archivo exista y el navegador arranque con él
+CHROMEDRIVER_CACHE_FILE = os.path.join(".cache", "chromedriver_path")
+
+# Recursos que el rastreo no necesita: solo interesa el DOM con los anclajes
+BLOCKED_RESOURCE_TYPES = ("image", "font", "media")
+BLOCKED_EXTENSIONS = [
+    "png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico", "bmp",
+    "woff", "woff2", "ttf", "otf", "eot",
+    "mp4", "webm", "m4v", "mov", "mp3", "ogg", "wav",
+]
+# Analítica y publicidad de terceros
+ANALYTICS_HOSTS = [
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googleadservices.com",
+    "connect.facebook.net", "facebook.com/tr", "hotjar.com", "clarity.ms", "bat.bing.com",
+    "analytics.tiktok.com", "snap.licdn.com", "cdn.segment.com", "newrelic.com", "nr-data.net",
+]
+BLOCKED_URL_PATTERNS = [f"*.{ext}" for ext in BLOCKED_EXTENSIONS] + [f"*{host}*" for host in ANALYTICS_HOSTS]
+
+log = get_logger("driver_pool")
+
+
+def get_chrome_options(download_dir=None, headless=False, lean=False):
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--disable-infobars")
+    options.add_argument("--start-maximized")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--window-size=1920,1080")
+
+    if headless:
+        options.add_argument("--headless=new")
+
+    prefs = {}
+    if lean:
+        # Sin imágenes ni sonido; el resto de recursos se bloquea por CDP al lanzar
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_argument("--mute-audio")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--disable-background-networking")
+        prefs["profile.managed_default_content_settings.images"] = 2
+
+    if download_dir:
+        prefs.update({
+            "download.default_directory": os.path.abspath(download_dir),
+            "download.prompt_for_download": False,
+            "download.directory_upgrade": True,
+            "plugins.always_open_pdf_externally": True,
+        })
+
+    if prefs:
+        options.add_experimental_option("prefs", prefs)
+
+    system = platform.system().lower()
+    if system == "windows":
+        chrome_path = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
+        if not os.path.exists(chrome_path):
+            chrome_path = r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe"
+        if os.path.exists(chrome_path):
+            options.binary_location = chrome_path
+    else:
+        options.binary_location = os.environ.get("CHROME_BIN", "/usr/bin/chromium-browser")
+
+    return options
+
+
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+
+
+def _read_cached_chromedriver():
+    try:
+        with open(CHROMEDRIVER_CACHE_FILE, "r", encoding="utf-8") as f:
+            path = f.read().strip()
+    except OSError:
+        return None
+    return path if path and os.path.exists(path) else None
+
+
+def chromedriver_path(refresh=False):
+    """
+    Ruta del chromedriver: CHROMEDRIVER_PATH si está definida; en Windows la que
+    resuelve webdriver_manager (puede consultar la red), guardada en
+    CHROMEDRIVER_CACHE_FILE; en el resto /usr/bin/chromedriver. Con `refresh`
+    se descarta la ruta guardada y se vuelve a resolver.
+    """
+    global _chromedriver_path
+    with _chromedriver_lock:
+        if _chromedriver_path and not refresh:
+            return _chromedriver_path
+
+        path = os.environ.get("CHROMEDRIVER_PATH")
+        if not path and platform.system().lower() != "windows":
+            path = "/usr/bin/chromedriver"
+        if not path and not refresh:
+            path = _read_cached_chromedriver()
+        if not path:
+            from webdriver_manager.chrome import ChromeDriverManager
+
+            path = ChromeDriverManager().install()
+            os.makedirs(os.path.dirname(CHROMEDRIVER_CACHE_FILE), exist_ok=True)
+            with open(CHROMEDRIVER_CACHE_FILE, "w", encoding="utf-8") as f:
+                f.write(path)
+            log.info("chromedriver resuelto: %s", path)
+
+        _chromedriver_path = path
+        return path
+
+
+def create_driver(options):
+    """Lanza un Chrome nuevo con el chromedriver adecuado para el sistema."""
+    from selenium import webdriver
+    from selenium.common.exceptions import SessionNotCreatedException
+    from selenium.webdriver.chrome.service import Service
+
+    try:
+        return webdriver.Chrome(service=Service(chromedriver_path()), options=options)
+    except SessionNotCreatedException:
+        # Chrome se actualizó y el chromedriver guardado ya no le corresponde
+        if os.environ.get("CHROMEDRIVER_PATH") or platform.system().lower() != "windows":
+            raise
+        log.warning("El chromedriver guardado no sirve para este Chrome, se resuelve de nuevo")
+        return webdriver.Chrome(service=Service(chromedriver_path(refresh=True)), options=options)
+
+
+class DriverPool:
+    """
+    Pool de tamaño fijo de instancias de Chrome reutilizables.
+
+    Los drivers se crean bajo demanda hasta `size`, se verifican antes de
+    entregarse y se limpian (cookies, storage, pestañas) al devolverse. Con
+    `blocked_urls` cada driver nuevo bloquea esos patrones vía CDP.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, options_factory=get_chrome_options, blocked_urls=None):
+        self.size = max(1, size)
+        self._options_factory = options_factory
+        self._blocked_urls = blocked_urls
+        # Drivers libres (el último devuelto sale primero). La condición protege
+        # la lista y `_created`, y despierta a quien espera cuando se libera un
+        # driver o un cupo
+        self._idle = []
+        self._lock = threading.Condition()
+        self._created = 0
+        self._closed = False
+        self.stats = {"launches": 0, "checkouts": 0, "replaced": 0}
+
+    @contextmanager
+    def driver(self, timeout=None):
+        driver = self.acquire(timeout=timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def acquire(self, timeout=None):
+        """Entrega un driver sano; bloquea si todos están en uso y el pool está lleno."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("El pool de drivers ya fue cerrado")
+            self.stats["checkouts"] += 1
+
+        while True:
+            with self._lock:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("El pool de drivers ya fue cerrado")
+                    if self._idle:
+                        driver, launch = self._idle.pop(), False
+                        break
+                    if self._created < self.size:
+                        self._created += 1
+                        driver, launch = None, True
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("No hay drivers disponibles en el pool")
+                    self._lock.wait(remaining)
+
+            if launch:
+                return self._launch()
+            if self._is_healthy(driver):
+                return driver
+
+            log.warning("Driver no responde, se reemplaza por uno nuevo.")
+            self._discard(driver)
+            with self._lock:
+                self.stats["replaced"] += 1
+
+    def release(self, driver):
+        """Devuelve el driver al pool tras limpiar su estado; si falla la limpieza se descarta."""
+        if self._closed:
+            self._discard(driver)
+            return
+        try:
+            self._reset(driver)
+        except Exception as e:
+            log.warning("No se pudo limpiar el driver (%s), se descarta.", e)
+            self._discard(driver)
+            return
+        with self._lock:
+            self._idle.append(driver)
+            self._lock.notify()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            drivers, self._idle = self._idle, []
+            self._lock.notify_all()
+        for driver in drivers:
+            self._discard(driver)
+
+    def summary(self):
+        stats = dict(self.stats)
+        stats["launches_avoided"] = max(0, stats["checkouts"] - stats["launches"])
+        return stats
+
+    def _launch(self):
+        try:
+            driver = create_driver(self._options_factory())
+        except Exception:
+            with self._lock:
+                self._created -= 1
+                self._lock.notify()
+            raise
+        with self._lock:
+            self.stats["launches"] += 1
+        if self._blocked_urls:
+            self._block_urls(driver, self._blocked_urls)
+        return driver
+
+    @staticmethod
+    def _block_urls(driver, patterns):
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        except Exception as e:
+            # Sin CDP (otro navegador) se sigue con la página completa
+            log.debug("No se pudieron bloquear recursos: %s", e)
+
+    def _discard(self, driver):
+        # El cupo liberado despierta a un `acquire` bloqueado para que lance un reemplazo
+        with self._lock:
+            self._created -= 1
+            self._lock.notify()
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _is_healthy(driver):
+        try:
+            driver.execute_script("return 1;")
+            return len(driver.window_handles) > 0
+        except Exception:
+            return False
+
+    @staticmethod
+    def _reset(driver):
+        driver.switch_to.default_content()
+
+        # Cerrar pestañas extra abiertas durante el uso
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+
+        try:
+            driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except Exception:
+            # about:blank y algunos orígenes no exponen storage
+            pass
+        try:
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        except Exception:
+            driver.delete_all_cookies()
+
+        driver.get("about:blank")
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+_PROFILES = {
+    # Rastreo: headless, sin imágenes, fuentes, medios ni analítica
+    "lean": {"options": lambda: get_chrome_options(headless=True, lean=True), "blocked_urls": BLOCKED_URL_PATTERNS},
+    # Headless con la página completa, para sitios que se rompen al bloquear recursos
+    "full": {"options": lambda: get_chrome_options(headless=True), "blocked_urls": None},
+    # Ventana visible, para depurar
+    "visible": {"options": lambda: get_chrome_options(), "blocked_urls": None},
+}
+
+DEFAULT_PROFILE = os.environ.get("CRAWL_BROWSER_PROFILE", "lean")
+
+# Perfil por administradora cuando un sitio no funciona con el de rastreo.
+# También se puede fijar sin tocar código: CRAWL_BROWSER_PROFILES="bbva=full,itau=visible"
+ADMIN_PROFILES = {}
+
+
+def _profiles_from_env(value):
+    profiles = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        admin, _, profile = item.partition("=")
+        profiles[admin.strip().lower()] = profile.strip()
+    return profiles
+
+
+ADMIN_PROFILES.update(_profiles_from_env(os.environ.get("CRAWL_BROWSER_PROFILES", "")))
+
+
+def profile_for(admin, default=None):
+    """
+    Perfil de navegador con el que se rastrea la administradora: el de
+    CRAWL_BROWSER_PROFILES, si no el `default` de su adaptador, si no DEFAULT_PROFILE.
+    """
+    return ADMIN_PROFILES.get(admin.lower().strip(), default or DEFAULT_PROFILE)
+
+
+def get_driver_pool(profile=None, size=None):
+    """Devuelve el pool compartido del perfil indicado (o el por defecto), creándolo la primera vez."""
+    profile = profile or DEFAULT_PROFILE
+    if profile not in _PROFILES:
+        raise ValueError(f"Perfil de navegador desconocido: '{profile}' (disponibles: {', '.join(_PROFILES)})")
+    with _pools_lock:
+        pool = _pools.get(profile)
+        if pool is None:
+            config = _PROFILES[profile]
+            pool = DriverPool(size or DEFAULT_POOL_SIZE, options_factory=config["options"],
+                              blocked_urls=config["blocked_urls"])
+            _pools[profile] = pool
+        elif size and size > pool.size:
+            pool.size = size
+        return pool
+
+
+def pool_stats():
+    """Estadísticas agregadas de todos los pools creados en el proceso."""
+    totals = {"launches": 0, "checkouts": 0, "replaced": 0, "launches_avoided": 0}
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        for key, value in pool.summary().items():
+            totals[key] += value
+    return totals
+
+
+def close_all_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
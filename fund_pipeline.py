@@ -0,0 +1,154 @@
+import os
+
+from Scraping import Scraping
+from logger import get_logger, fields, fund_debug
+from run_journal import FAILED_STATUSES
+
+log = get_logger("crawler")
+
+
+def create_output_dir(admin, year, month, scraping_instance):
+    admin_clean = "".join(c for c in admin if c.isalnum() or c.isspace())
+    admin_words = admin_clean.title().split()
+    admin_formatted = "".join(admin_words)
+
+    month_variations = scraping_instance.find_month_variations(month)
+    month_numeric = next((m for m in month_variations if m.isdigit() and len(m) == 2), None)
+    month_final = month_numeric or month
+
+    output_dir = os.path.join("Fichas tecnicas", f"{admin_formatted}_{year}", month_final)
+    os.makedirs(output_dir, exist_ok=True)
+
+    return output_dir
+
+
+def fund_output_path(admin, fondo, year, month, scraping_instance):
+    """Carpeta y nombre de archivo de la ficha de un fondo dentro de 'Fichas tecnicas'."""
+    output_dir = create_output_dir(admin, year, month, scraping_instance)
+    safe_fondo = "".join(c for c in fondo if c.isalnum() or c in (" ", "_", "-")).rstrip()
+    return output_dir, f"{safe_fondo}.pdf"
+
+
+def process_result(links, admin, fondo, year, month, adelantar=False):
+    """Ranking (top-K y margen de confianza) de los enlaces de la página para el fondo."""
+    scraping = Scraping()
+    return scraping.rank_links(links, admin, fondo, year, month, adelantar=adelantar)
+
+
+def apply_ranking(result, ranking):
+    """
+    Anota en el resultado el enlace elegido y su margen. Con margen bajo el
+    fondo se descarga igual pero queda marcado para revisión manual.
+    """
+    result["link"] = ranking.best
+    result["score"] = ranking.score
+    result["margin"] = ranking.margin
+    result["review"] = ranking.low_confidence()
+    if result["review"]:
+        log.warning("%s (%s) - Margen de confianza bajo (%.2f), se marca para revisión",
+                    result["fondo"], result["admin"], ranking.margin,
+                    extra=fields(candidatos=[candidate.href for candidate in ranking.candidates[:3]]))
+    return ranking.best
+
+
+def snapshot_links(url, admin, harvest, snapshots=None, offline=False):
+    """
+    Enlaces de la página desde su instantánea vigente; si no hay, se cosechan
+    con `harvest()` y se guardan. En modo offline solo se usan instantáneas,
+    sin importar su edad.
+    """
+    if snapshots is not None:
+        links = snapshots.get(url, ignore_ttl=offline)
+        if links is not None:
+            log.info("[Snapshot] %s - %d enlaces", url, len(links))
+            return links
+    if offline:
+        raise LookupError(f"No hay instantánea de {url} (modo offline)")
+
+    links = harvest()
+    # Una lista vacía suele ser una carga fallida: no se guarda
+    if snapshots is not None and links:
+        snapshots.put(url, links, admin=admin)
+    return links
+
+
+def skip_download(url, output_dir, filename):
+    """Descarga nula del modo offline: el fondo queda rankeado pero no se baja nada."""
+    return {"status": "ranked", "path": None}
+
+
+def error_results(admin, tareas, error, journal=None):
+    """Un resultado 'error' por tarea (fondo, year, month) cuando la página no se pudo cosechar."""
+    results = []
+    for fondo, year, month in tareas:
+        log.error("Error en %s (%s) - %s", fondo, admin, error)
+        result = {"admin": admin, "fondo": fondo, "year": year, "month": month,
+                  "status": "error", "link": None, "error": str(error)}
+        if journal is not None:
+            journal.record_result(result)
+        results.append(result)
+    return results
+
+
+def process_fund(all_links, admin, fondo, year, month, download=None, journal=None, normalized_links=None,
+                 adelantar=False):
+    """
+    Filtra los enlaces ya cosechados para un fondo y descarga la mejor opción.
+    `download(url, output_dir, filename)` reemplaza la descarga HTTP por
+    defecto (ej. la sesión de navegador de Itaú) y `normalized_links` trae los
+    enlaces de la página ya normalizados cuando varios fondos la comparten.
+    El detalle de depuración del fondo solo se escribe si no se obtuvo la ficha.
+    """
+    with fund_debug(admin, fondo) as debug_buffer:
+        result = _process_fund(all_links, admin, fondo, year, month, download=download, journal=journal,
+                               normalized_links=normalized_links, adelantar=adelantar)
+        if result["status"] in FAILED_STATUSES:
+            debug_buffer.flush(reason=result["status"])
+    if journal is not None:
+        journal.record_result(result)
+    return result
+
+
+def _process_fund(all_links, admin, fondo, year, month, download=None, journal=None, normalized_links=None,
+                  adelantar=False):
+    result = {"admin": admin, "fondo": fondo, "year": year, "month": month, "status": None, "link": None}
+
+    try:
+        if not all_links:
+            log.warning("%s (%s) - No se encontraron enlaces en la página", fondo, admin)
+            result["status"] = "no_links"
+            return result
+
+        if normalized_links is not None:
+            ranking = Scraping().rank_normalized(normalized_links, admin, fondo, year, month, adelantar=adelantar)
+        else:
+            ranking = process_result(all_links, admin, fondo, year, month, adelantar=adelantar)
+        if not ranking:
+            log.warning("%s (%s) - No se encontraron links válidos tras el filtrado AI", fondo, admin)
+            result["status"] = "no_match"
+            return result
+
+        best_link = apply_ranking(result, ranking)
+        log.info("%s (%s) - Links encontrados: %d", fondo, admin, len(all_links),
+                 extra=fields(mejor=best_link, peso=ranking.score, margen=ranking.margin))
+        if journal is not None:
+            journal.record(admin, fondo, year, month, "found", link=best_link)
+
+        if download is skip_download:
+            # Modo offline: solo ranking, sin crear carpetas de salida
+            downloaded = skip_download(best_link, output_dir=None, filename=None)
+        else:
+            scraping = Scraping()
+            output_dir, filename = fund_output_path(admin, fondo, year, month, scraping)
+
+            # --- Descargar PDF ---
+            downloaded = (download or scraping.download_pdf)(best_link, output_dir=output_dir, filename=filename)
+        result["status"] = downloaded["status"]
+        result["path"] = downloaded["path"]
+
+    except Exception as e:
+        log.error("Error en %s (%s) - %s", fondo, admin, e)
+        result["status"] = "error"
+        result["error"] = str(e)
+
+    return result
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import os
+import threading
+from collections import defaultdict
+from urllib.parse import urljoin, urlparse
+
+import httpx
+from bs4 import BeautifulSoup
+
+from http_session import async_client
+from logger import get_logger
+from scheduler import DEFAULT_PER_HOST
+
+TIER_HTTP = "http"
+TIER_BROWSER = "browser"
+
+TIERS_FILE = os.path.join(".cache", "fetch_tiers.json")
+
+log = get_logger("http")
+
+def domain_of(url):
+    return urlparse(url).netloc.lower()
+
+
+class TierMemory:
+    """Recuerda por dominio qué nivel de obtención (HTTP o navegador) funcionó la última vez."""
+
+    def __init__(self, path=TIERS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._tiers = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._tiers = json.load(f)
+            except (OSError, ValueError):
+                self._tiers = {}
+
+    def get(self, url):
+        return self._tiers.get(domain_of(url))
+
+    def record(self, url, tier):
+        domain = domain_of(url)
+        with self._lock:
+            if self._tiers.get(domain) == tier:
+                return
+            self._tiers[domain] = tier
+            self._save()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._tiers, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+def parse_pdf_anchors(html, base_url):
+    """Extrae los anclajes a PDF de un HTML servido por el servidor (sin JavaScript)."""
+    soup = BeautifulSoup(html, "lxml")
+    links = []
+    for a in soup.find_all("a", href=True):
+        href = urljoin(base_url, a["href"].strip())
+        if ".pdf" in href.lower():
+            links.append({
+                "href": href,
+                "text": a.get_text(" ", strip=True),
+                "title": a.get("title") or "",
+            })
+    return links
+
+
+async def _fetch_one(client, url, semaphore):
+    async with semaphore:
+        try:
+            response = await client.get(url)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            log.debug("No se pudo obtener %s: %s", url, e)
+            return url, []
+        return url, parse_pdf_anchors(response.text, str(response.url))
+
+
+async def _fetch_all(urls, per_host, timeout):
+    semaphores = defaultdict(lambda: asyncio.Semaphore(per_host))
+    async with async_client(timeout=timeout) as client:
+        tasks = [_fetch_one(client, url, semaphores[domain_of(url)]) for url in urls]
+        return dict(await asyncio.gather(*tasks))
+
+
+def fetch_static_links(urls, tiers=None, per_host=DEFAULT_PER_HOST, timeout=20):
+    """
+    Intenta obtener los enlaces PDF de cada URL con un GET asíncrono simple.
+
+    Retorna {url: links} solo para las URLs donde el HTML estático ya trae
+    anclajes .pdf; el resto debe pasar al navegador. Los dominios que la
+    memoria marca como de navegador no se consultan por HTTP.
+    """
+    tiers = tiers or TierMemory()
+    candidates = [url for url in dict.fromkeys(urls) if tiers.get(url) != TIER_BROWSER]
+    if not candidates:
+        return {}
+
+    fetched = asyncio.run(_fetch_all(candidates, per_host, timeout))
+
+    static = {}
+    for url, links in fetched.items():
+        if links:
+            static[url] = links
+            tiers.record(url, TIER_HTTP)
+    log.info("%d/%d páginas resueltas sin navegador", len(static), len(candidates))
+    return static
@@ -0,0 +1,78 @@
+import os
+import threading
+
+import httpx
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+from logger import get_logger
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Política única de cabeceras para todo el tráfico HTTP del proyecto
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
+)
+USER_AGENT = os.environ.get("HTTP_USER_AGENT", DEFAULT_USER_AGENT)
+ACCEPT_LANGUAGE = os.environ.get("HTTP_ACCEPT_LANGUAGE", "es-CO,es;q=0.9,en;q=0.8")
+
+# Hosts con pool propio y conexiones keep-alive por host
+HTTP_POOL_HOSTS = int(os.environ.get("HTTP_POOL_HOSTS", "32"))
+HTTP_PER_HOST_CONNECTIONS = int(os.environ.get("HTTP_PER_HOST_CONNECTIONS", "8"))
+
+log = get_logger("http")
+
+# Varias fiduciarias publican con certificados incompletos; se descarga sin verificar
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def default_headers():
+    return {"User-Agent": USER_AGENT, "Accept-Language": ACCEPT_LANGUAGE}
+
+
+def get_session():
+    """
+    Sesión `requests` compartida por todo el proceso: un pool keep-alive por
+    host (hasta HTTP_PER_HOST_CONNECTIONS conexiones) y las cabeceras comunes.
+    Los reintentos los maneja cada llamador.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_PER_HOST_CONNECTIONS,
+                                  max_retries=0)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(default_headers())
+            session.verify = False
+            _session = session
+        return _session
+
+
+def async_client(timeout=20, **kwargs):
+    """
+    Cliente httpx asíncrono con la misma política de cabeceras y límites,
+    y HTTP/2 cuando `h2` está instalado. Se crea por cada bucle de asyncio.
+    """
+    limits = httpx.Limits(max_connections=HTTP_POOL_HOSTS * HTTP_PER_HOST_CONNECTIONS,
+                          max_keepalive_connections=HTTP_POOL_HOSTS)
+    return httpx.AsyncClient(http2=HTTP2_AVAILABLE, headers=default_headers(), verify=False,
+                             follow_redirects=True, timeout=timeout, limits=limits, **kwargs)
+
+
+def close_session():
+    global _session
+    with _session_lock:
+        session, _session = _session, None
+    if session is not None:
+        session.close()
@@ -1,72 +1,242 @@
 # itau_scraper.py
 
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
-import time
-
-def get_itau_links(url: str):
-    """Abre el fondo de Itau, entra a 'Fichas técnicas' y recorre todas las páginas para extraer los links."""
-    options = webdriver.ChromeOptions()
-    options.add_argument("--start-maximized")
-    driver = webdriver.Chrome(options=options)
-
-    wait = WebDriverWait(driver, 15)
-    todos_los_enlaces = set()
-
-    try:
-        print("[INFO] Cargando página:", url)
-        driver.get(url)
-
-        # Esperar y hacer clic en “Fichas técnicas”
-        print("[INFO] Abriendo la sección de Fichas técnicas...")
-        fichas_link = wait.until(EC.presence_of_element_located(
-            (By.XPATH, "//a[contains(@title, 'Fichas técnicas')]")
-        ))
-        driver.execute_script("arguments[0].scrollIntoView(true);", fichas_link)
-        
-        driver.execute_script("arguments[0].click();", fichas_link)
-        
-
-        def extraer_enlaces_actuales():
-            soup = BeautifulSoup(driver.page_source, "html.parser")
-            enlaces = []
-            for a in soup.find_all("a", href=True):
-                href = a["href"]
-                
-                if href.startswith("/"):
-                    href = "https://banco.itau.co" + href
-                enlaces.append(href)
-            return enlaces
-
-        # Extraer los de la primera página
-        todos_los_enlaces.update(extraer_enlaces_actuales())
-
-        # Recorrer las páginas con botón “Siguiente”
+import os
+
+from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+from adapters import AdminAdapter
+from download_cache import get_download_cache
+from driver_pool import profile_for, BLOCKED_RESOURCE_TYPES, ANALYTICS_HOSTS
+from fund_pipeline import snapshot_links, process_fund
+from http_session import USER_AGENT, ACCEPT_LANGUAGE
+from logger import get_logger
+
+log = get_logger("itau")
+
+PAGE_TIMEOUT = 30_000
+FICHAS_TIMEOUT = 15_000
+DATATABLES_TIMEOUT = 10_000
+PAGINATION_TIMEOUT = 5_000
+
+# Lee de una vez todas las filas de las DataTables de la página (no solo la
+# página visible). Retorna null mientras alguna tabla no haya terminado de
+# inicializarse o tenga una petición ajax en curso; si la tabla es server-side
+# pide todas las filas en un solo draw y sigue retornando null hasta que el
+# evento draw.dt de ese redibujo confirme que llegaron.
+DATATABLES_LINKS_JS = """() => {
+    const $ = window.jQuery;
+    if (!$ || !$.fn || !$.fn.dataTable) return null;
+    const tablas = $.fn.dataTable.tables();
+    if (!tablas.length) return null;
+
+    const enlaces = new Set();
+    const agregar = href => {
+        if (href && !href.startsWith('javascript') && href !== '#') {
+            enlaces.add(new URL(href, location.href).href);
+        }
+    };
+    const parser = new DOMParser();
+
+    for (const tabla of tablas) {
+        const api = $(tabla).DataTable();
+        const ajustes = api.settings()[0];
+        if (!ajustes || !ajustes._bInitComplete) return null;
+        if (ajustes.jqXHR && ajustes.jqXHR.readyState !== 4) return null;
+        if (tabla.__esperandoTodas) return null;
+
+        const info = api.page.info();
+        if (info.serverSide && info.length !== -1 && info.recordsDisplay > info.end - info.start) {
+            tabla.__esperandoTodas = true;
+            api.one('draw.dt', () => { tabla.__esperandoTodas = false; });
+            api.page.len(-1).draw(false);
+            return null;
+        }
+        api.rows().nodes().toArray().forEach(fila => {
+            if (fila) fila.querySelectorAll('a[href]').forEach(a => agregar(a.getAttribute('href')));
+        });
+        // Con deferRender las filas no pintadas no tienen nodo: se leen del arreglo de datos
+        api.rows().data().toArray().forEach(datos => {
+            const celdas = Array.isArray(datos) ? datos : Object.values(datos || {});
+            celdas.forEach(celda => {
+                if (typeof celda === 'string' && celda.includes('<a')) {
+                    parser.parseFromString(celda, 'text/html')
+                        .querySelectorAll('a[href]').forEach(a => agregar(a.getAttribute('href')));
+                }
+            });
+        });
+    }
+    return Array.from(enlaces);
+}"""
+
+# Todos los anclajes visibles en el DOM actual, con la URL ya absoluta
+PAGE_LINKS_JS = """() => Array.from(document.querySelectorAll('a[href]'))
+    .map(a => a.getAttribute('href'))
+    .filter(href => href && !href.startsWith('javascript') && href !== '#')
+    .map(href => new URL(href, location.href).href)"""
+
+
+class ItauSession:
+    """
+    Un solo Chromium headless de Playwright para todo Itaú: la misma página
+    descubre los enlaces de las fichas y la misma sesión (cookies incluidas)
+    descarga los PDF, sin ventana visible ni un navegador nuevo por fondo.
+
+    Respeta el perfil de navegador de Itaú: 'lean' bloquea imágenes, fuentes,
+    medios y analítica mientras se buscan enlaces, 'full' carga todo y
+    'visible' abre la ventana.
+    """
+
+    def __init__(self, profile=None):
+        profile = profile or profile_for("itau")
+        self._blocking = profile == "lean"
+        self._playwright = sync_playwright().start()
+        try:
+            self.browser = self._playwright.chromium.launch(headless=profile != "visible")
+            # Misma política de cabeceras que el resto del tráfico HTTP (evita el UA "HeadlessChrome")
+            self.context = self.browser.new_context(accept_downloads=True, user_agent=USER_AGENT,
+                                                    extra_http_headers={"Accept-Language": ACCEPT_LANGUAGE})
+            self.page = self.context.new_page()
+            self.page.set_default_timeout(PAGE_TIMEOUT)
+            if self._blocking:
+                self.page.route("**/*", self._filter_request)
+        except Exception:
+            self._playwright.stop()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def _filter_request(self, route):
+        request = route.request
+        if self._blocking and (request.resource_type in BLOCKED_RESOURCE_TYPES
+                               or any(host in request.url for host in ANALYTICS_HOSTS)):
+            route.abort()
+        else:
+            route.continue_()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        try:
+            self.browser.close()
+        finally:
+            self._playwright.stop()
+
+    def get_links(self, url):
+        """Abre el fondo de Itau, entra a 'Fichas técnicas' y extrae los links de todas las páginas de la tabla."""
+        page = self.page
+        log.info("Cargando página: %s", url)
+        page.goto(url, wait_until="domcontentloaded")
+
+        log.debug("Abriendo la sección de Fichas técnicas...")
+        fichas_link = page.locator("a[title*='Fichas técnicas']").first
+        fichas_link.wait_for(state="attached", timeout=FICHAS_TIMEOUT)
+        fichas_link.evaluate("el => { el.scrollIntoView(true); el.click(); }")
+
+        todos_los_enlaces = set(page.evaluate(PAGE_LINKS_JS))
+
+        # Modo captura: leer el arreglo completo de la tabla en una sola llamada
+        enlaces_tabla = self._datatables_links()
+        if enlaces_tabla:
+            todos_los_enlaces.update(enlaces_tabla)
+            log.info("Total enlaces Itau encontrados: %d (DataTables)", len(todos_los_enlaces))
+            return sorted(todos_los_enlaces)
+
+        # Respaldo: recorrer las páginas con botón “Siguiente”
+        log.debug("DataTables no disponible o sin fichas, se pagina con el botón Siguiente")
+        siguiente = page.locator("button.paginate_button.next").first
         while True:
             try:
-                siguiente_btn = wait.until(EC.element_to_be_clickable(
-                    (By.CSS_SELECTOR, "button.paginate_button.next")
-                ))
-                driver.execute_script("arguments[0].scrollIntoView(true);", siguiente_btn)
-                driver.execute_script("arguments[0].click();", siguiente_btn)
-                
-                nuevos = extraer_enlaces_actuales()
-                nuevos_enlaces = [e for e in nuevos if e not in todos_los_enlaces]
-                if nuevos_enlaces:
-                    todos_los_enlaces.update(nuevos_enlaces)
-                else:
-                    break
-            except Exception:
+                siguiente.wait_for(state="visible", timeout=PAGINATION_TIMEOUT)
+                siguiente.evaluate("el => { el.scrollIntoView(true); el.click(); }")
+            except PlaywrightTimeoutError:
                 break
+            nuevos = set(page.evaluate(PAGE_LINKS_JS)) - todos_los_enlaces
+            if not nuevos:
+                break
+            todos_los_enlaces.update(nuevos)
+
+        log.info("Total enlaces Itau encontrados: %d", len(todos_los_enlaces))
+        return sorted(todos_los_enlaces)
+
+    def _datatables_links(self):
+        """Enlaces de todas las filas una vez cargadas las tablas; None si no hay DataTables a tiempo."""
+        try:
+            handle = self.page.wait_for_function(DATATABLES_LINKS_JS, timeout=DATATABLES_TIMEOUT, polling=250)
+        except PlaywrightTimeoutError:
+            return None
+        return handle.json_value()
+
+    def download_pdf(self, url, filepath, cache=None):
+        """
+        Guarda la ficha en `filepath`. Primero pide el cuerpo del PDF con las
+        cookies de la sesión; si el servidor responde 200 con el visor HTML en
+        vez del PDF, se carga el visor y se imprime con `page.pdf()`.
+
+        Igual que `Scraping.download_pdf`, no se reescribe el archivo si el
+        contenido tiene el mismo SHA-256 que el guardado. Retorna
+        {'path', 'status'} con status 'downloaded' o 'unchanged'.
+        """
+        cache = cache or get_download_cache()
+        tmp_path = filepath + ".part"
+        response = self.context.request.get(url, timeout=PAGE_TIMEOUT)
+        if not response.ok:
+            raise Exception(f"Error {response.status}: No se pudo descargar {url}")
+
+        body = response.body()
+        headers = response.headers
+        if body.startswith(b"%PDF"):
+            with open(tmp_path, "wb") as f:
+                f.write(body)
+            log.debug("PDF capturado directo de la respuesta: %s", url)
+        elif "html" in headers.get("content-type", "").lower():
+            log.debug("La respuesta es el visor HTML, se imprime: %s", url)
+            # El visor se imprime completo: sin bloqueo de imágenes ni fuentes
+            blocking, self._blocking = self._blocking, False
+            try:
+                self.page.goto(url, wait_until="networkidle")
+                self.page.pdf(path=tmp_path, print_background=True)
+            finally:
+                self._blocking = blocking
+            headers = {}
+        else:
+            raise Exception(f"La respuesta de {url} no es un PDF ({headers.get('content-type', 'sin tipo')})")
+
+        return cache.finalize(url, tmp_path, filepath,
+                              etag=headers.get("etag"), last_modified=headers.get("last-modified"))
+
+
+def itau_links(hrefs):
+    """Enlaces {href, text, title} a partir de los href que entrega la sesión."""
+    return [{"href": href, "text": "Fichas técnicas Itau", "title": "Ficha Itau"} for href in hrefs]
+
+
+class ItauAdapter(AdminAdapter):
+    """Itaú: un solo Chromium headless de Playwright descubre los enlaces y guarda los PDF."""
+
+    harvest = "playwright"
+    batch = True
+    static_fetch = False
+
+    def harvest_links(self, url, prefetched=None, tiers=None):
+        with ItauSession(profile=self.profile) as session:
+            return itau_links(session.get_links(url))
 
-        print(f"[INFO] Total enlaces Itau encontrados: {len(todos_los_enlaces)}")
-        return list(sorted(todos_los_enlaces))
+    def crawl_batch(self, admin, paginas, journal=None, snapshots=None):
+        """La misma sesión sirve para todas las páginas y todas las descargas."""
+        results = []
+        with ItauSession(profile=self.profile) as session:
+            def download(url, output_dir, filename):
+                return session.download_pdf(url, os.path.join(output_dir, filename))
 
-    except Exception as e:
-        print(f"[ERROR] Ocurrió un problema con Itau: {e}")
-        return []
-    finally:
-        driver.quit()
+            for link, tareas in paginas:
+                try:
+                    all_links = snapshot_links(link, admin, lambda: itau_links(session.get_links(link)),
+                                               snapshots=snapshots)
+                except Exception as e:
+                    log.error("Ocurrió un problema con Itau: %s", e)
+                    all_links = []
+                results.extend(process_fund(all_links, admin, fondo, year, month, download=download,
+                                            journal=journal, adelantar=self.adelantar)
+                               for fondo, year, month in tareas)
+        return results
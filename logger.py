@@ -0,0 +1,117 @@
+import logging
+import sys
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+ROOT_LOGGER = "fichas"
+FUND_BUFFER_SIZE = 2000
+
+_local = threading.local()
+_console = None
+_verbose = False
+
+logging.getLogger(ROOT_LOGGER).addHandler(logging.NullHandler())
+
+
+def get_logger(name):
+    """Logger hijo del espacio 'fichas' (ej. get_logger('scraping') -> 'fichas.scraping')."""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def fields(**values):
+    """Campos estructurados para un registro: log.info("Descargado", extra=fields(path=p))."""
+    return {"fields": values}
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formato `nivel logger mensaje clave=valor ...`; los campos salen de `extra=fields(...)`."""
+
+    def format(self, record):
+        message = super().format(record)
+        values = getattr(record, "fields", None)
+        if values:
+            message += " " + " ".join(f"{key}={value!r}" for key, value in values.items())
+        fund = getattr(record, "fund", None)
+        if fund:
+            message = f"[{fund}] {message}"
+        return message
+
+
+class FundBuffer:
+    """Registros de depuración de un fondo, retenidos en memoria hasta saber si hacen falta."""
+
+    def __init__(self, label, maxlen=FUND_BUFFER_SIZE):
+        self.label = label
+        self.records = deque(maxlen=maxlen)
+        self.failed = False
+
+    def flush(self, reason=None):
+        """Escribe los registros retenidos en consola (solo se llama si el fondo falló)."""
+        if _console is None or not self.records:
+            self.records.clear()
+            return
+        get_logger("debug").warning(
+            "Detalle de depuración de %s (%d registros)", self.label, len(self.records),
+            extra=fields(motivo=reason) if reason else None,
+        )
+        for record in self.records:
+            record.fund = self.label
+            _console.handle(record)
+        self.records.clear()
+
+
+class _FundBufferHandler(logging.Handler):
+    """Desvía los DEBUG al buffer del fondo activo en el hilo; sin buffer activo se descartan."""
+
+    def __init__(self):
+        super().__init__(level=logging.DEBUG)
+
+    def emit(self, record):
+        if _verbose or record.levelno >= logging.INFO:
+            return
+        buffer = getattr(_local, "buffer", None)
+        if buffer is not None:
+            buffer.records.append(record)
+
+
+def configure_logging(verbose=False, stream=None):
+    """Instala la salida a consola. En modo verbose los DEBUG se escriben de inmediato."""
+    global _console, _verbose
+    _verbose = verbose
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(logging.DEBUG)
+    root.propagate = False
+    for handler in list(root.handlers):
+        if not isinstance(handler, logging.NullHandler):
+            root.removeHandler(handler)
+
+    _console = logging.StreamHandler(stream or sys.stdout)
+    _console.setLevel(logging.DEBUG if verbose else logging.INFO)
+    _console.setFormatter(StructuredFormatter("%(levelname)-7s %(name)s: %(message)s"))
+    root.addHandler(_console)
+    root.addHandler(_FundBufferHandler())
+
+
+def debug_enabled():
+    """True si un DEBUG llegaría a algún lado (modo verbose o buffer de fondo activo)."""
+    return _verbose or getattr(_local, "buffer", None) is not None
+
+
+@contextmanager
+def fund_debug(admin, fondo):
+    """
+    Activa un buffer de depuración para el fondo en el hilo actual. Los DEBUG
+    emitidos dentro se escriben solo si se llama `flush()` o si hay excepción.
+    """
+    buffer = FundBuffer(f"{admin}/{fondo}")
+    previous = getattr(_local, "buffer", None)
+    _local.buffer = buffer
+    try:
+        yield buffer
+    except Exception as e:
+        buffer.flush(reason=str(e))
+        raise
+    finally:
+        _local.buffer = previous
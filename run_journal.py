@@ -0,0 +1,105 @@
+import json
+import os
+import threading
+import time
+
+from logger import get_logger
+
+JOURNAL_FILE = os.path.join(".cache", "run_journal.jsonl")
+
+# Estados finales de un fondo: ya descargado (o vigente) o fallido
+DONE_STATUSES = ("downloaded", "not_modified", "unchanged")
+FAILED_STATUSES = ("error", "no_links", "no_match")
+
+log = get_logger("journal")
+
+
+def journal_key(admin, fondo, year, month):
+    return admin, fondo, str(year), str(month).lower().strip()
+
+
+class RunJournal:
+    """
+    Bitácora de solo-anexar (JSONL) con el avance de cada fondo por periodo.
+
+    Cada paso terminado agrega una línea {admin, fondo, year, month, status, ...};
+    el último registro de cada (admin, fondo, year, month) es su estado actual.
+    Si la ejecución muere, al reiniciar solo se retoma lo que no terminó.
+    Con `readonly` solo se lee el estado: no se crea ni se abre el archivo
+    para escribir (ej. `--plan`).
+    """
+
+    def __init__(self, path=JOURNAL_FILE, readonly=False):
+        self.path = path
+        self._lock = threading.Lock()
+        self._state = {}
+        self._file = None
+        self._load()
+        if readonly:
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        if self._file.tell() and not self._ends_with_newline():
+            # Cerrar la línea truncada para no pegarle el siguiente registro
+            self._file.write("\n")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Última línea a medio escribir si el proceso murió
+                    continue
+                self._state[journal_key(entry["admin"], entry["fondo"], entry["year"], entry["month"])] = entry
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+
+    def status(self, admin, fondo, year, month):
+        entry = self._state.get(journal_key(admin, fondo, year, month))
+        return entry["status"] if entry else None
+
+    def record(self, admin, fondo, year, month, status, **data):
+        entry = {"admin": admin, "fondo": fondo, "year": str(year), "month": str(month),
+                 "status": status, "ts": round(time.time(), 3), **data}
+        line = json.dumps(entry, ensure_ascii=False)
+        if self._file is None:
+            raise RuntimeError(f"La bitácora {self.path} está abierta solo para lectura")
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._state[journal_key(admin, fondo, year, month)] = entry
+
+    def record_result(self, result):
+        """Registra el resultado final de un fondo tal como lo retorna el crawler."""
+        data = {key: result[key] for key in ("link", "path", "error", "margin", "review") if result.get(key) is not None}
+        self.record(result["admin"], result["fondo"], result["year"], result["month"], result["status"], **data)
+
+    def pending(self, resultados, year, month, retry_failed=False):
+        """
+        Filtra las tuplas (admin, fondo, link) a las que faltan en el periodo:
+        las que no llegaron a un estado final o, con `retry_failed`, solo las fallidas.
+        """
+        final = DONE_STATUSES + FAILED_STATUSES
+
+        pendientes = []
+        for admin, fondo, link in resultados:
+            status = self.status(admin, fondo, year, month)
+            if (status in FAILED_STATUSES) if retry_failed else (status not in final):
+                pendientes.append((admin, fondo, link))
+
+        omitidos = len(resultados) - len(pendientes)
+        if omitidos:
+            log.info("Bitácora: %d fondos ya procesados se omiten, %d pendientes", omitidos, len(pendientes))
+        return pendientes
@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+
+from logger import get_logger, fields
+
+log = get_logger("scheduler")
+
+DEFAULT_WORKERS = int(os.environ.get("CRAWL_WORKERS", "4"))
+DEFAULT_PER_HOST = int(os.environ.get("CRAWL_PER_HOST", "1"))
+
+
+def host_of(url):
+    return urlparse(url).netloc.lower() or url
+
+
+class RunSummary:
+    """Acumula los resultados por fondo y los errores de una ejecución completa."""
+
+    def __init__(self):
+        self.results = []
+        self.errors = []
+        self.started_at = time.time()
+        self.finished_at = None
+        self.extra = {}
+        self._lock = threading.Lock()
+
+    def add_results(self, results):
+        with self._lock:
+            self.results.extend(results or [])
+
+    def add_error(self, url, error):
+        with self._lock:
+            self.errors.append({"url": url, "error": str(error)})
+
+    def finish(self, **extra):
+        self.finished_at = time.time()
+        self.extra.update(extra)
+
+    def counts(self):
+        return Counter(r["status"] for r in self.results)
+
+    def to_dict(self):
+        return {
+            "duration_s": round((self.finished_at or time.time()) - self.started_at, 2),
+            "counts": dict(self.counts()),
+            "results": self.results,
+            "errors": self.errors,
+            **self.extra,
+        }
+
+    def report(self):
+        data = self.to_dict()
+        log.info("Resumen de la ejecución", extra=fields(duracion_s=data["duration_s"], **data["counts"]))
+        for result in self.results:
+            if result["status"] == "error":
+                log.error("✗ %s (%s): %s", result["fondo"], result["admin"], result.get("error"))
+        for error in self.errors:
+            log.error("✗ %s: %s", error["url"], error["error"])
+        for result in self.results:
+            if result.get("review"):
+                log.warning("? %s (%s) %s %s: revisar, margen %.2f → %s", result["fondo"], result["admin"],
+                            result["month"], result["year"], result["margin"], result["link"])
+        for key, value in self.extra.items():
+            log.info("%s", key, extra=fields(**value) if isinstance(value, dict) else fields(valor=value))
+
+
+class CrawlScheduler:
+    """
+    Ejecuta trabajos de rastreo en paralelo con un tope global de workers y
+    un tope de trabajos simultáneos por host. Los trabajos de un host saturado
+    esperan en cola sin ocupar un worker.
+    """
+
+    def __init__(self, max_workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST):
+        self.max_workers = max(1, max_workers)
+        self.per_host = max(1, per_host)
+
+    def run(self, jobs, summary=None):
+        """
+        Ejecuta `jobs`, una lista de tuplas (url, callable). Lo que retorne cada
+        callable (lista de resultados por fondo) se agrega al resumen.
+        """
+        summary = summary or RunSummary()
+        pending = deque(jobs)
+        active_per_host = Counter()
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                # Despachar todo lo que quepa respetando ambos topes
+                for _ in range(len(pending)):
+                    if len(running) >= self.max_workers:
+                        break
+                    url, job = pending.popleft()
+                    host = host_of(url)
+                    if active_per_host[host] >= self.per_host:
+                        pending.append((url, job))
+                        continue
+                    active_per_host[host] += 1
+                    running[executor.submit(job)] = (url, host)
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, host = running.pop(future)
+                    active_per_host[host] -= 1
+                    try:
+                        summary.add_results(future.result())
+                    except Exception as e:
+                        log.error("Error rastreando %s: %s", url, e)
+                        summary.add_error(url, e)
+
+        return summary
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from logger import get_logger
+
+SNAPSHOT_DIR = os.path.join(".cache", "snapshots")
+# Los listados de fichas cambian una vez al mes; un día basta para re-ejecuciones
+SNAPSHOT_TTL_HOURS = float(os.environ.get("SNAPSHOT_TTL_HOURS", "24"))
+
+log = get_logger("snapshots")
+
+
+def links_digest(links):
+    """SHA-256 estable de una lista de enlaces {href, text, title}."""
+    payload = json.dumps(links, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SnapshotCache:
+    """
+    Instantáneas en disco de los enlaces cosechados por URL.
+
+    Cada lista de enlaces se guarda una sola vez en `objects/<sha256>.json`
+    (mismo formato que los fixtures de benchmarks/) y `index.json` apunta
+    cada URL a su objeto con la fecha de captura. Una instantánea vale
+    mientras no supere `ttl_hours`; en modo offline se usa sin importar la edad.
+    """
+
+    def __init__(self, directory=SNAPSHOT_DIR, ttl_hours=SNAPSHOT_TTL_HOURS):
+        self.directory = directory
+        self.ttl_hours = ttl_hours
+        self.index_path = os.path.join(directory, "index.json")
+        self._lock = threading.Lock()
+        self._index = {}
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {}
+
+    def _object_path(self, digest):
+        return os.path.join(self.directory, "objects", f"{digest}.json")
+
+    def age_hours(self, url):
+        entry = self._index.get(url)
+        if entry is None:
+            return None
+        return (time.time() - entry["saved_at"]) / 3600
+
+    def is_fresh(self, url):
+        age = self.age_hours(url)
+        return age is not None and age <= self.ttl_hours
+
+    def get(self, url, ignore_ttl=False):
+        """Enlaces guardados para `url`, o None si no hay instantánea (o si venció)."""
+        entry = self._index.get(url)
+        if entry is None or not (ignore_ttl or self.is_fresh(url)):
+            return None
+        try:
+            with open(self._object_path(entry["sha256"]), "r", encoding="utf-8") as f:
+                return json.load(f)["links"]
+        except (OSError, ValueError, KeyError):
+            log.warning("Instantánea ilegible para %s, se ignora", url)
+            return None
+
+    def put(self, url, links, admin=None):
+        digest = links_digest(links)
+        path = self._object_path(digest)
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                self._write_json(path, {"admin": admin, "url": url, "links": links})
+            self._index[url] = {"sha256": digest, "saved_at": time.time(), "admin": admin, "count": len(links)}
+            self._save_index()
+        return digest
+
+    def invalidate(self, urls=None):
+        """Olvida las instantáneas de `urls` (o todas); los objetos huérfanos se borran."""
+        with self._lock:
+            if urls is None:
+                removed = list(self._index)
+                self._index.clear()
+            else:
+                removed = [url for url in urls if self._index.pop(url, None) is not None]
+            self._save_index()
+            self._prune()
+        if removed:
+            log.info("%d instantáneas invalidadas", len(removed))
+        return removed
+
+    def _prune(self):
+        objects_dir = os.path.join(self.directory, "objects")
+        if not os.path.isdir(objects_dir):
+            return
+        alive = {entry["sha256"] for entry in self._index.values()}
+        for name in os.listdir(objects_dir):
+            if name.endswith(".json") and name[:-5] not in alive:
+                os.remove(os.path.join(objects_dir, name))
+
+    def _save_index(self):
+        self._write_json(self.index_path, self._index)
+
+    @staticmethod
+    def _write_json(path, data):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)